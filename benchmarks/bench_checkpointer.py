@@ -0,0 +1,109 @@
+"""Benchmark: SqliteCheckpointSaver vs InMemorySaver on memory retained and write throughput.
+
+Runs the same fake-LLM tickets (zero model latency, so the checkpointer dominates) against each
+saver and reports tickets/sec, checkpoint puts/sec, Python heap retained after the run and, for
+SQLite, the database size on disk.
+
+    python -m benchmarks.bench_checkpointer --tickets 500 --turns 3
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+from src import graph as graph_module
+from src.checkpoint import SqliteCheckpointSaver
+from src.runner import arun_tickets
+
+
+def counting_puts(saver) -> dict:
+    counts = {"puts": 0}
+    put = saver.put
+
+    def counted_put(*args, **kwargs):
+        counts["puts"] += 1
+        return put(*args, **kwargs)
+
+    saver.put = counted_put
+    return counts
+
+
+async def run_tickets(saver, tickets: int, concurrency: int):
+    graph = graph_module.build_graph().compile(checkpointer=saver, interrupt_before=["human_escalation"])
+    queries = (f"Ticket {i}: the strap on my $600 bag broke, I want a refund." for i in range(tickets))
+    async for result in arun_tickets(queries, max_concurrency=concurrency, graph=graph):
+        if result["error"]:
+            raise RuntimeError(result["error"])
+
+
+def measure(make_saver, tickets: int, concurrency: int) -> dict:
+    saver = make_saver()
+    counts = counting_puts(saver)
+    start = time.perf_counter()
+    asyncio.run(run_tickets(saver, tickets, concurrency))
+    elapsed = time.perf_counter() - start
+    if hasattr(saver, "flush"):
+        saver.flush()
+
+    # Separate pass for memory, since tracing allocations slows everything down
+    gc.collect()
+    tracemalloc.start()
+    traced_saver = make_saver()
+    asyncio.run(run_tickets(traced_saver, tickets, concurrency))
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    result = {
+        "tickets_per_s": round(tickets / elapsed, 2),
+        "checkpoint_puts_per_s": round(counts["puts"] / elapsed, 1),
+        "checkpoint_puts": counts["puts"],
+        "retained_heap_bytes": retained,
+    }
+    if isinstance(saver, SqliteCheckpointSaver):
+        result["db_bytes"] = sum(p.stat().st_size for p in Path(saver.path).parent.glob(Path(saver.path).name + "*"))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare checkpointers on the fake LLM backend.")
+    parser.add_argument("--tickets", type=int, default=300)
+    parser.add_argument("--turns", type=int, default=3, help="MAX_DEBATE_TURNS")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--keep-last", type=int, default=5)
+    parser.add_argument("--commit-every", type=int, default=1)
+    parser.add_argument("--output", default="bench_checkpointer.json")
+    args = parser.parse_args()
+
+    os.environ.update(LLM_BACKEND="fake", FAKE_LLM_LATENCY_MS="0", MAX_DEBATE_TURNS=str(args.turns))
+    os.environ.pop("LLM_CACHE_PATH", None)
+    graph_module.invalidate_llm_clients()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = iter(range(1_000_000))
+
+        def sqlite_saver():
+            path = os.path.join(tmp, f"checkpoints-{next(runs)}.sqlite")
+            return SqliteCheckpointSaver(path, keep_last=args.keep_last, commit_every=args.commit_every)
+
+        results = {
+            "InMemorySaver": measure(InMemorySaver, args.tickets, args.concurrency),
+            "SqliteCheckpointSaver": measure(sqlite_saver, args.tickets, args.concurrency),
+        }
+
+    for name, result in results.items():
+        print(f"{name:22s} {json.dumps(result)}")
+    with open(args.output, "w") as f:
+        json.dump({"settings": vars(args), "results": results}, f, indent=2)
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""End-to-end benchmark of the compiled debate graph on the offline fake LLM backend.
+
+Runs every combination of MAX_DEBATE_TURNS and ticket count through `src.runner.arun_tickets`
+and reports tickets/sec, per-node latency percentiles, checkpoint bytes per ticket and peak RSS.
+Results are written as JSON so runs can be diffed or compared across commits.
+
+    python -m benchmarks.bench_graph --turns 1 3 5 --tickets 50 200 --output bench_graph.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langgraph.checkpoint.memory import InMemorySaver
+
+from src import graph as graph_module
+from src.graph import convergence_stats, speculation_stats
+from src.fake_llm import reset_fake_llm
+from src.routing import reset_routing, routing_report
+from src.runner import arun_tickets
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Collects wall-clock latency of every graph node run, keyed by node name."""
+
+    run_inline = True
+
+    def __init__(self):
+        self.started = {}
+        self.latencies = defaultdict(list)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self.started[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        if run_id in self.started:
+            node, start = self.started.pop(run_id)
+            self.latencies[node].append(time.perf_counter() - start)
+
+    on_chain_error = on_chain_end
+
+
+def percentiles(samples: list[float]) -> dict:
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else 0.0
+        return {"p50_ms": value, "p95_ms": value, "p99_ms": value, "count": len(samples)}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+        "count": len(samples),
+    }
+
+
+def checkpoint_bytes(saver: InMemorySaver) -> int:
+    total = 0
+    for checkpoint_tuple in saver.list(None):
+        total += len(saver.serde.dumps_typed(checkpoint_tuple.checkpoint)[1])
+        for _, _, value in checkpoint_tuple.pending_writes or []:
+            total += len(saver.serde.dumps_typed(value)[1])
+    return total
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+async def run_scenario(turns: int, tickets: int, concurrency: int, speculative: bool = False, routing: dict | None = None) -> dict:
+    reset_fake_llm()
+    reset_routing()
+    saver = InMemorySaver()
+    graph = graph_module.build_graph().compile(checkpointer=saver, interrupt_before=["human_escalation"])
+    timer = NodeTimer()
+
+    queries = (f"Ticket {i}: the colour of my bag looks different in sunlight, I want a refund." for i in range(tickets))
+    start = time.perf_counter()
+    errors = 0
+    ticket_latencies = []
+    states = []
+    configurable = {"max_debate_turns": turns, "speculative_redraft": speculative, **(routing or {})}
+    config = {"callbacks": [timer], "configurable": configurable}
+    async for result in arun_tickets(queries, max_concurrency=concurrency, graph=graph, config=config):
+        errors += bool(result["error"])
+        ticket_latencies.append(result["latency_s"])
+        states.append(result["state"])
+    elapsed = time.perf_counter() - start
+
+    return {
+        "max_debate_turns": turns,
+        "tickets": tickets,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "tickets_per_s": round(tickets / elapsed, 3),
+        "ticket_latency": percentiles(ticket_latencies),
+        "node_latency": {node: percentiles(samples) for node, samples in sorted(timer.latencies.items())},
+        "checkpoint_bytes_per_ticket": checkpoint_bytes(saver) // max(tickets, 1),
+        "speculation": speculation_stats(state.get("budget", {}) for state in states),
+        "convergence": convergence_stats(states),
+        "routing": routing_report(),
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the debate graph on the fake LLM backend.")
+    parser.add_argument("--turns", type=int, nargs="+", default=[1, 3, 5], help="MAX_DEBATE_TURNS values")
+    parser.add_argument("--tickets", type=int, nargs="+", default=[20, 100], help="ticket counts")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=20, help="median fake LLM latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="log-normal spread of fake LLM latency (tail weight)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="injected rate-limit error probability")
+    parser.add_argument("--verdicts", default="PASS", help="scripted judge verdicts per ticket, e.g. FAIL,PASS")
+    parser.add_argument("--speculative", action="store_true", help="enable SPECULATIVE_REDRAFT")
+    parser.add_argument("--hedge-percentile", type=float, default=0, help="LLM_HEDGE_PERCENTILE (0 disables hedging)")
+    parser.add_argument("--call-timeout-s", type=float, default=0, help="LLM_CALL_TIMEOUT_S (0 disables)")
+    parser.add_argument("--adaptive-routing", action="store_true", help="enable LLM_ADAPTIVE_ROUTING")
+    parser.add_argument("--output", default="bench_graph.json")
+    args = parser.parse_args()
+
+    os.environ.update(
+        LLM_BACKEND="fake",
+        FAKE_LLM_LATENCY_MS=str(args.latency_ms),
+        FAKE_LLM_LATENCY_SIGMA=str(args.latency_sigma),
+        FAKE_LLM_FAILURE_RATE=str(args.failure_rate),
+        FAKE_LLM_VERDICTS=args.verdicts,
+        FAKE_LLM_SEED="0",
+    )
+    os.environ.pop("LLM_CACHE_PATH", None)
+    graph_module.invalidate_llm_clients()
+
+    routing = {
+        "llm_hedge_percentile": args.hedge_percentile,
+        "llm_call_timeout_s": args.call_timeout_s,
+        "llm_adaptive_routing": args.adaptive_routing,
+    }
+    results = []
+    for turns in args.turns:
+        for tickets in args.tickets:
+            result = asyncio.run(run_scenario(turns, tickets, args.concurrency, args.speculative, routing))
+            results.append(result)
+            print(
+                f"turns={turns} tickets={tickets}: {result['tickets_per_s']:.1f} tickets/s, "
+                f"p95 ticket {result['ticket_latency']['p95_ms']:.0f} ms, "
+                f"{result['checkpoint_bytes_per_ticket']} checkpoint bytes/ticket, "
+                f"{result['convergence']['avg_cycles_per_pass']} cycles/PASS, "
+                f"hedge rate {result['routing']['hedge_rate']}"
+            )
+
+    report = {"settings": vars(args), "python": platform.python_version(), "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
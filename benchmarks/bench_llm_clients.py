@@ -0,0 +1,63 @@
+"""Micro-benchmark: per-node LLM setup cost before and after the shared client registry.
+
+"Before" rebuilds the primary and fallback clients on every node call (the original `get_llm`);
+"after" goes through the registry in `src.graph.get_llm`. No API calls are made.
+
+    python -m benchmarks.bench_llm_clients --iterations 200
+"""
+import argparse
+import os
+import time
+
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+# Client construction only validates that a key is present; no request is sent.
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+
+from src.graph import (  # noqa: E402
+    CritiqueResponse,
+    DefenseResponse,
+    DraftResponse,
+    JudgeResponse,
+    LLM_MAX_RETRIES,
+    LLM_TEMPERATURE,
+    get_llm,
+    invalidate_llm_clients,
+)
+
+SCHEMAS = [DraftResponse, CritiqueResponse, DefenseResponse, JudgeResponse]
+
+
+def build_uncached(schema):
+    model_name = os.environ.get("LLM_MODEL_NAME", "gemini-2.5-flash-lite")
+    fallback_model_name = os.environ.get("LLM_FALLBACK_MODEL_NAME", "gemini-3-flash-preview")
+    primary_llm = ChatGoogleGenerativeAI(model=model_name, temperature=LLM_TEMPERATURE, max_retries=LLM_MAX_RETRIES).with_structured_output(schema)
+    fallback_llm = ChatGoogleGenerativeAI(model=fallback_model_name, temperature=LLM_TEMPERATURE, max_retries=LLM_MAX_RETRIES).with_structured_output(schema)
+    return primary_llm.with_fallbacks([fallback_llm])
+
+
+def time_per_call(factory, iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        factory(SCHEMAS[i % len(SCHEMAS)])
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    before = time_per_call(build_uncached, args.iterations)
+    invalidate_llm_clients()
+    for schema in SCHEMAS:
+        get_llm(schema)  # a long-running worker has already warmed the registry
+    after = time_per_call(get_llm, args.iterations)
+
+    print(f"per-node setup, rebuilt clients : {before * 1e6:10.1f} us")
+    print(f"per-node setup, shared registry : {after * 1e6:10.1f} us")
+    print(f"speedup                         : {before / after:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark: cold-start cost of the debate graph.
+
+Each sample runs in a fresh interpreter and reports the time to import `src.graph`, to build and
+compile the graph on first use (`get_graph()`), and to serve the first ticket end to end on the
+fake LLM backend (time-to-first-request, measured from interpreter start of the sample). Medians
+over the samples are written as JSON so regressions in import-time work show up across commits.
+
+    python -m benchmarks.bench_startup --samples 5 --output bench_startup.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Runs in the child interpreter; prints one JSON line of timings in seconds
+SAMPLE = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import src.graph
+imported = time.perf_counter()
+heavy = sorted(m for m in ("langchain_google_genai", "langgraph.graph", "src.checkpoint", "src.fake_llm") if m in sys.modules)
+graph = src.graph.get_graph()
+compiled = time.perf_counter()
+from src.runner import arun_ticket
+result = asyncio.run(arun_ticket("The strap on my $600 bag broke after a week, I want a refund."))
+served = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - start,
+    "get_graph_s": compiled - imported,
+    "first_request_s": served - compiled,
+    "time_to_first_request_s": served - start,
+    "modules_loaded_at_import": heavy,
+    "error": result["error"],
+}))
+"""
+
+
+def run_sample(env: dict) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-c", SAMPLE],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0, help="fake model latency per call")
+    parser.add_argument("--output", default="bench_startup.json")
+    args = parser.parse_args()
+
+    samples = []
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "PYTHONPATH": str(ROOT),
+            "LLM_BACKEND": "fake",
+            "FAKE_LLM_LATENCY_MS": str(args.latency_ms),
+            "FAKE_LLM_SEED": "0",
+            "MAX_DEBATE_TURNS": "1",
+            "METRICS_FILE": "",
+        }
+        env.pop("LLM_CACHE_PATH", None)
+        for i in range(args.samples):
+            env["CHECKPOINT_DB"] = str(Path(tmp) / f"checkpoints-{i}.sqlite")
+            samples.append(run_sample(env))
+
+    timings = ("import_s", "get_graph_s", "first_request_s", "time_to_first_request_s")
+    median = {name: round(statistics.median(sample[name] for sample in samples), 4) for name in timings}
+    print(
+        f"import {median['import_s'] * 1000:.0f} ms, get_graph {median['get_graph_s'] * 1000:.0f} ms, "
+        f"first request {median['first_request_s'] * 1000:.0f} ms, "
+        f"time to first request {median['time_to_first_request_s'] * 1000:.0f} ms"
+    )
+    if samples[0]["modules_loaded_at_import"]:
+        print(f"loaded eagerly by `import src.graph`: {', '.join(samples[0]['modules_loaded_at_import'])}")
+
+    report = {"settings": vars(args), "python": platform.python_version(), "median": median, "samples": samples}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark: checkpoint cost per ticket as the debate grows.
+
+For each MAX_DEBATE_TURNS value, runs tickets on the fake LLM backend (zero model latency)
+against SqliteCheckpointSaver and reports, per ticket, the checkpoint puts, the bytes actually
+written (checkpoint plus per-channel blobs, where the append-only debate transcript is stored as
+deltas) and the time spent serializing them. The same checkpoints are also serialized whole, as a
+full snapshot of every channel value at every step, which is the quadratic baseline the per-step
+deltas are compared against.
+
+    python -m benchmarks.bench_state_growth --turns 1 2 3 5 8 --tickets 50 --output bench_state_growth.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import tempfile
+import time
+
+from src import graph as graph_module
+from src.checkpoint import SqliteCheckpointSaver
+from src.fake_llm import reset_fake_llm
+from src.runner import arun_tickets
+
+
+class MeasuringSaver(SqliteCheckpointSaver):
+    """Counts what every put writes and how long it takes to serialize, next to a full-snapshot encoding."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.totals = {"puts": 0, "bytes": 0, "serialize_s": 0.0, "snapshot_bytes": 0, "snapshot_serialize_s": 0.0}
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        start = time.perf_counter()
+        _, snapshot = self._dumps(checkpoint)
+        self.totals["snapshot_serialize_s"] += time.perf_counter() - start
+        self.totals["snapshot_bytes"] += len(snapshot)
+        # The checkpoint itself, without values, as `put` stores it; the channel blobs are counted below
+        start = time.perf_counter()
+        _, data = self._dumps({**checkpoint, "channel_values": {}})
+        self.totals["serialize_s"] += time.perf_counter() - start
+        self.totals["bytes"] += len(data)
+        self.totals["puts"] += 1
+        return super().put(config, checkpoint, metadata, new_versions)
+
+    def _encode_channels(self, *args):
+        start = time.perf_counter()
+        rows = super()._encode_channels(*args)
+        self.totals["serialize_s"] += time.perf_counter() - start
+        self.totals["bytes"] += sum(len(row[-1]) for row in rows)
+        return rows
+
+
+async def run_tickets(saver, tickets: int, concurrency: int):
+    graph = graph_module.build_graph().compile(checkpointer=saver, interrupt_before=["human_escalation"])
+    queries = (f"Ticket {i}: the strap on my $600 bag broke after a week, I want a refund." for i in range(tickets))
+    async for result in arun_tickets(queries, max_concurrency=concurrency, graph=graph):
+        if result["error"]:
+            raise RuntimeError(result["error"])
+
+
+def measure(turns: int, tickets: int, concurrency: int, path: str) -> dict:
+    os.environ["MAX_DEBATE_TURNS"] = str(turns)
+    graph_module.invalidate_llm_clients()
+    reset_fake_llm()
+    saver = MeasuringSaver(path)
+    asyncio.run(run_tickets(saver, tickets, concurrency))
+    saver.close()
+    totals = saver.totals
+    return {
+        "turns": turns,
+        "puts_per_ticket": round(totals["puts"] / tickets, 2),
+        "bytes_per_ticket": round(totals["bytes"] / tickets),
+        "serialize_ms_per_ticket": round(totals["serialize_s"] / tickets * 1000, 3),
+        "snapshot_bytes_per_ticket": round(totals["snapshot_bytes"] / tickets),
+        "snapshot_serialize_ms_per_ticket": round(totals["snapshot_serialize_s"] / tickets * 1000, 3),
+        "bytes_saved_ratio": round(1 - totals["bytes"] / totals["snapshot_bytes"], 4) if totals["snapshot_bytes"] else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, nargs="+", default=[1, 2, 3, 5, 8], help="MAX_DEBATE_TURNS values")
+    parser.add_argument("--tickets", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output", default="bench_state_growth.json")
+    args = parser.parse_args()
+
+    os.environ.update(LLM_BACKEND="fake", FAKE_LLM_LATENCY_MS="0", FAKE_LLM_SEED="0", METRICS_FILE="")
+    os.environ.pop("LLM_CACHE_PATH", None)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for turns in args.turns:
+            result = measure(turns, args.tickets, args.concurrency, os.path.join(tmp, f"checkpoints-{turns}.sqlite"))
+            results.append(result)
+            print(
+                f"turns={turns:<3d} puts/ticket {result['puts_per_ticket']:6.1f}  "
+                f"bytes/ticket {result['bytes_per_ticket']:8d} (snapshot {result['snapshot_bytes_per_ticket']:8d})  "
+                f"serialize {result['serialize_ms_per_ticket']:7.3f} ms (snapshot {result['snapshot_serialize_ms_per_ticket']:7.3f} ms)"
+            )
+
+    with open(args.output, "w") as f:
+        json.dump({"settings": vars(args), "python": platform.python_version(), "results": results}, f, indent=2)
+    print(f"wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
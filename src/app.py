@@ -2,6 +2,7 @@ import streamlit as st
 import os
 import time
 import sys
+import uuid
 import importlib
 from pathlib import Path
 from dotenv import load_dotenv
@@ -22,10 +23,6 @@ st.set_page_config(
 # Run immediately to load credentials for security gate
 load_dotenv(override=True)
 
-from src.graph import graph, load_prompt
-from langfuse.langchain import CallbackHandler
-langfuse_handler = CallbackHandler()
-
 # --- SECURITY GATE ---
 def check_password():
     """Returns `True` if the user had the correct password or is already authenticated."""
@@ -136,6 +133,13 @@ def check_password():
 if not check_password():
     st.stop()
 
+# Deferred past the gate so the login page renders without loading the graph or the tracing client
+from src.graph import load_prompt
+from src.metrics import metrics
+from src.streaming import stream_ticket
+from src.tracing import langfuse_handler as get_langfuse_handler, sampled_callbacks
+langfuse_handler = get_langfuse_handler()
+
 # Dark, Premium Aesthetic CSS overrides
 st.markdown("""
 <style>
@@ -231,25 +235,33 @@ st.markdown("""
 # UI Layout
 # ---------------------------------------------------------
 
+# One checkpoint thread per browser session
+if "thread_id" not in st.session_state:
+    st.session_state.thread_id = f"vip_ticket_luxury_{uuid.uuid4().hex[:12]}"
+
 # Sidebar Configuration
 with st.sidebar:
     st.markdown("### ⚙️ Engine Configuration")
-    os.environ["LLM_MODEL_NAME"] = st.selectbox(
+    llm_model_name = st.selectbox(
         "Primary LLM", 
         ["gemini-2.5-flash-lite", "gemini-3-flash-preview", "gemini-2.5-flash", "gemini-1.5-pro"],
         index=0
     )
-    os.environ["LLM_FALLBACK_MODEL_NAME"] = st.selectbox(
+    llm_fallback_model_name = st.selectbox(
         "Fallback LLM",
         ["gemini-3-flash-preview", "gemini-2.5-flash", "gemini-2.5-flash-lite", "gemini-1.5-pro"],
         index=0
     )
-    os.environ["MAX_DEBATE_TURNS"] = str(st.slider("Max Debate Turns", min_value=1, max_value=5, value=1))
+    max_debate_turns = st.slider("Max Debate Turns", min_value=1, max_value=5, value=1)
+    attacker_panel_size = st.slider("Attacker Panel Size", min_value=1, max_value=3, value=1, help="Parallel attacker personas per round (policy, financial exposure, tone).")
     
     st.markdown("---")
     st.markdown("**Observability**")
-    st.success("✅ Langfuse Tracing Active")
-    st.markdown("Session ID: `vip_ticket_luxury_001`")
+    if langfuse_handler is not None:
+        st.success(f"✅ Langfuse Tracing Active (sampling {float(os.environ.get('LANGFUSE_SAMPLE_RATE', 1)):.0%} of runs)")
+    else:
+        st.info("Langfuse tracing off (local metrics only)")
+    st.markdown(f"Session ID: `{st.session_state.thread_id}`")
     trace_link_container = st.empty()
     if "trace_url" in st.session_state:
         trace_link_container.markdown(f"[🔗 View Trace in Langfuse]({st.session_state.trace_url})")
@@ -277,17 +289,25 @@ if run_button:
     st.markdown("### 🧠 Execution Trace")
     
     # State tracking setup
+    # Engine settings travel with this run's config rather than os.environ, so concurrent sessions don't leak into each other
     config = {
-        "configurable": {"thread_id": "vip_ticket_luxury_001"}, 
-        "callbacks": [langfuse_handler]
+        "configurable": {
+            "thread_id": st.session_state.thread_id,
+            "llm_model_name": llm_model_name,
+            "llm_fallback_model_name": llm_fallback_model_name,
+            "max_debate_turns": max_debate_turns,
+            "attacker_panel_size": attacker_panel_size,
+        },
+        "callbacks": sampled_callbacks()
     }
+    traced = bool(config["callbacks"])
     
     # Pre-capture the trace URL (if possible) or wait for first event
     # For Langfuse CallbackHandler, trace ID might only be assigned after a run starts.
     # We will try to fetch it, but gracefully fallback if the trace doesn't exist yet.
     try:
         # In newer Langfuse versions, get_trace_url is on the client instance
-        trace_url = langfuse_handler.client.get_trace_url()
+        trace_url = langfuse_handler.client.get_trace_url() if traced else None
         if trace_url:
             st.session_state.trace_url = trace_url
             trace_link_container.markdown(f"[🔗 View Trace in Langfuse]({trace_url})")
@@ -304,9 +324,10 @@ if run_button:
     with status_container.status("Initializing State Graph...", expanded=True) as status:
         
         try:
-            for event in graph.stream({"query": query}, config=config):
+            live_preview = None
+            for event in stream_ticket({"query": query}, config):
                 # Once the graph starts, the trace is guaranteed to be created
-                if "trace_url" not in st.session_state or not st.session_state.trace_url:
+                if traced and ("trace_url" not in st.session_state or not st.session_state.trace_url):
                     try:
                         trace_id = getattr(langfuse_handler, "last_trace_id", None)
                         if trace_id:
@@ -316,7 +337,31 @@ if run_button:
                     except Exception:
                         pass
 
-                for node_name, node_state in event.items():
+                if event["type"] == "node_start":
+                    status.update(label=f"Executing Node: {event['node'].upper()}...")
+                    continue
+                if event["type"] == "partial":
+                    # Show the draft and the judge's synthesis while their tokens arrive
+                    preview = event["fields"].get({"draft": "draft", "judge": "debate_synthesis"}.get(event["node"], ""))
+                    if isinstance(preview, str) and preview:
+                        if live_preview is None:
+                            with trace_container:
+                                live_preview = st.empty()
+                        live_preview.info(f"✍️ {event['node'].upper()} (streaming)\n\n{preview}")
+                    continue
+                if event["type"] == "end":
+                    if event["first_token_s"]:
+                        with trace_container:
+                            st.caption("Time to first token: " + ", ".join(
+                                f"{node} {max(seconds):.2f}s" for node, seconds in event["first_token_s"].items()
+                            ))
+                    continue
+                if live_preview is not None:
+                    live_preview.empty()
+                    live_preview = None
+                updates = {"__interrupt__": event["value"]} if event["type"] == "interrupt" else {event["node"]: event["update"]}
+
+                for node_name, node_state in updates.items():
                     
                     # Handle interrupted states (Human-in-the-Loop Edge cases)
                     if not isinstance(node_state, dict):
@@ -339,14 +384,14 @@ if run_button:
                         elif node_name == 'attacker':
                             with st.expander("🛡️ ATTACKER NODE (Critique)", expanded=False):
                                 st.markdown("*(Adversarial Evaluation)*")
-                                st.markdown(node_state.get('critique', ''))
+                                st.markdown("\n\n".join(record['text'] for record in node_state.get('debate_rounds', [])))
                                 if node_state.get('identified_ambiguities'):
                                     st.warning("🚨 Ambiguities Identified: " + ", ".join(node_state.get('identified_ambiguities', [])))
                                     
                         elif node_name == 'defender':
                             with st.expander("⚔️ DEFENDER NODE (Rebuttal)", expanded=False):
                                 st.markdown("*(Logical Defense)*")
-                                st.markdown(node_state.get('defense', ''))
+                                st.markdown("\n\n".join(record['text'] for record in node_state.get('debate_rounds', [])))
                                 if node_state.get('concessions'):
                                     st.info("💡 Concessions: " + ", ".join(node_state.get('concessions', [])))
                                     
@@ -379,3 +424,7 @@ if run_button:
     # Add a success toast when stream completes
     if not status_container.text == "⚠️ MANAGER ESCALATION REQUIRED":
         st.toast("Debate Framework Execution Complete!", icon="🎉")
+
+    # Process-local metrics (src/metrics.py), recorded for every run whether or not it was traced
+    with st.sidebar.expander("📈 Local Metrics"):
+        st.code(metrics.prometheus_text(), language="text")
@@ -0,0 +1,170 @@
+"""Offline batch mode: runs every ticket in a JSONL file through the debate graph.
+
+    python -m src.batch tickets.jsonl results.jsonl --concurrency 16
+
+Each input line is a JSON object with a "query" and an optional "ticket_id" (or "id"); lines
+without an id are identified by their line number. A line that is not such an object gets an
+error record keyed by its line number and the batch moves on. Results are appended to the output file as
+each ticket finishes, so a killed run can simply be restarted: tickets that already have a
+successful result are skipped. With --coalesce, near-duplicate tickets reuse the verified draft of
+their cluster's representative instead of each running the debate (see src/coalesce.py).
+"""
+import argparse
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Callable, Iterator
+
+from dotenv import load_dotenv
+
+from src.coalesce import TicketCoalescer, arun_coalesced
+from src.runner import arun_tickets
+
+
+def finished_ticket_ids(output_path: Path) -> set[str]:
+    """Ids of tickets that already have an error-free result in the output file."""
+    finished = set()
+    if not output_path.exists():
+        return finished
+    with open(output_path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short when the previous run was killed
+            if not record.get("error"):
+                finished.add(record["ticket_id"])
+    return finished
+
+
+def drop_partial_line(output_path: Path):
+    """Truncates a last line cut short by a killed run, so the next record starts on a line of its own."""
+    if not output_path.exists():
+        return
+    with open(output_path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        # Walk back in blocks to the last newline; the cut line's ticket has no result and is run again
+        while position > 0:
+            block = min(65_536, position)
+            f.seek(position - block)
+            newline = f.read(block).rfind(b"\n")
+            if newline >= 0:
+                position = position - block + newline + 1
+                break
+            position -= block
+        if position < end:
+            f.truncate(position)
+
+
+def read_tickets(input_path: Path, skip: set[str], invalid: Callable[[dict], None] | None = None) -> Iterator[dict]:
+    """Streams tickets from the input file one line at a time.
+
+    Lines that are not a JSON object with a "query" are skipped, and their error record is passed
+    to `invalid`.
+    """
+    with open(input_path, "r") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                ticket_id = record.get("ticket_id", record.get("id"))
+                query = record["query"]
+            except (json.JSONDecodeError, AttributeError, KeyError, TypeError) as e:
+                if invalid is not None:
+                    error = f"invalid ticket: {type(e).__name__}: {e}"
+                    invalid({"ticket_id": f"line-{line_number}", "line": line_number, "error": error})
+                continue
+            ticket_id = f"line-{line_number}" if ticket_id is None else str(ticket_id)
+            if ticket_id in skip:
+                continue
+            yield {"ticket_id": ticket_id, "thread_id": f"batch_{ticket_id}", "query": query}
+
+
+def result_record(result: dict) -> dict:
+    state = result["state"]
+    return {
+        "ticket_id": result["ticket"]["ticket_id"],
+        "thread_id": result["thread_id"],
+        "draft": state.get("draft"),
+        "verdict": state.get("verdict"),
+        "debate_synthesis": state.get("debate_synthesis"),
+        "turn_count": state.get("turn_count"),
+        "triage": state.get("triage"),
+        "risk_score": state.get("risk_score"),
+        "interrupted": result["interrupted"],
+        "latency_s": round(result["latency_s"], 3),
+        "input_tokens": result["input_tokens"],
+        "output_tokens": result["output_tokens"],
+        "cached_input_tokens": result["cached_input_tokens"],
+        "llm_calls": result["llm_calls"],
+        "coalesced_with": result.get("coalesced_with"),
+        "reuse": result.get("reuse"),
+        "budget": state.get("budget"),
+        "error": result["error"],
+    }
+
+
+async def run_batch(input_path: Path, output_path: Path, max_concurrency: int, coalescer: TicketCoalescer | None = None) -> dict:
+    drop_partial_line(output_path)
+    skip = finished_ticket_ids(output_path)
+    counts = {"skipped": len(skip), "completed": 0, "failed": 0, "passed": 0, "debated_passes": 0, "pass_cycles": 0}
+    with open(output_path, "a") as out:
+
+        def write(record: dict):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+
+        def invalid(record: dict):
+            write(record)
+            counts["failed"] += 1
+
+        tickets = read_tickets(input_path, skip, invalid)
+        if coalescer is None:
+            results = arun_tickets(tickets, max_concurrency=max_concurrency)
+        else:
+            results = arun_coalesced(tickets, coalescer, max_concurrency=max_concurrency)
+        async for result in results:
+            write(result_record(result))
+            counts["failed" if result["error"] else "completed"] += 1
+            if result["state"].get("verdict") == "PASS":
+                counts["passed"] += 1
+                if not result.get("reuse"):  # coalesced tickets reuse another ticket's debate
+                    counts["debated_passes"] += 1
+                    counts["pass_cycles"] += result["state"].get("budget", {}).get("drafts", 0)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a JSONL file of tickets through the debate graph.")
+    parser.add_argument("input", type=Path, help="JSONL file with one ticket per line")
+    parser.add_argument("output", type=Path, help="JSONL file results are appended to")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=int(os.environ.get("MAX_CONCURRENT_TICKETS", 8)),
+        help="tickets in flight at once (default: MAX_CONCURRENT_TICKETS)",
+    )
+    parser.add_argument("--coalesce", action="store_true", help="debate one ticket per cluster of near-duplicates")
+    args = parser.parse_args()
+
+    load_dotenv()
+    coalescer = TicketCoalescer() if args.coalesce else None
+    counts = asyncio.run(run_batch(args.input, args.output, args.concurrency, coalescer))
+    cycles_per_pass = counts["pass_cycles"] / counts["debated_passes"] if counts["debated_passes"] else 0
+    print(
+        f"completed={counts['completed']} failed={counts['failed']} skipped={counts['skipped']} "
+        f"passed={counts['passed']} avg_cycles_per_pass={cycles_per_pass:.2f}"
+    )
+    if coalescer is not None:
+        stats = coalescer.stats()
+        print(
+            f"clusters={stats['clusters']} coalesced={stats['coalesced']} coalescing_ratio={stats['coalescing_ratio']:.2f} "
+            f"llm_calls_saved={stats['llm_calls_saved']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from pydantic import BaseModel
+
+
+class ResponseCache:
+    """SQLite-backed cache of structured LLM responses with size-bounded LRU eviction and a TTL.
+
+    Entries are keyed on backend, model name, output schema and a hash of the prompt messages, so a
+    response recorded on one backend (e.g. the fake one) is never served to another. All models run
+    at temperature 0, so a cached response is as good as a fresh one until it expires.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10_000, ttl_seconds: float = 86_400):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        self._size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def key(backend: str, model_name: str, schema: type[BaseModel], messages) -> str:
+        schema_hash = hashlib.sha256(json.dumps(schema.model_json_schema(), sort_keys=True).encode()).hexdigest()
+        payload = json.dumps(
+            [backend, model_name, schema.__name__, schema_hash, [(message.type, message.content) for message in messages]]
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str, schema: type[BaseModel]) -> BaseModel | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._size -= 1
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return schema.model_validate_json(row[0])
+
+    def put(self, key: str, response: BaseModel):
+        now = time.time()
+        with self._lock:
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, response.model_dump_json(), now, now),
+            ).rowcount
+            if not inserted:
+                self._conn.execute(
+                    "UPDATE responses SET value = ?, created_at = ?, accessed_at = ? WHERE key = ?",
+                    (response.model_dump_json(), now, now, key),
+                )
+            self._size += inserted
+            if self._size > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        # Expired entries go first, then the least recently used ones. Evicting down to 90% of
+        # the limit keeps eviction off the hot path for the next few inserts.
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        overflow = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - int(self.max_entries * 0.9)
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+        self._size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": self._size,
+        }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache | None:
+    """Returns the process-wide cache configured by LLM_CACHE_PATH, or None when caching is off."""
+    path = os.environ.get("LLM_CACHE_PATH")
+    if not path:
+        return None
+    max_entries = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 10_000))
+    ttl_seconds = float(os.environ.get("LLM_CACHE_TTL_SECONDS", 86_400))
+    key = (path, max_entries, ttl_seconds)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = ResponseCache(path, max_entries=max_entries, ttl_seconds=ttl_seconds)
+        return _caches[key]
@@ -0,0 +1,593 @@
+"""Durable, bounded LangGraph checkpointer backed by a local SQLite file.
+
+Unlike InMemorySaver it survives restarts (paused human escalations can be resumed) and keeps
+memory flat: only the latest `keep_last` checkpoints per thread are retained, and finished threads
+older than a TTL are removed by `compact`. Threads paused for human escalation are never evicted.
+
+Channel values are stored apart from the checkpoint, one blob per channel version, and only for
+the channels a step changed. A list channel that only grew since the previous checkpoint of the
+thread (the append-only debate transcript) is stored as the appended items on top of its previous
+version, so a step's checkpoint costs its delta rather than the whole accumulated history.
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+from src.metrics import metrics
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE INDEX IF NOT EXISTS checkpoints_created_at ON checkpoints (thread_id, created_at);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    task_path TEXT NOT NULL DEFAULT '',
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    base_version TEXT,
+    root_version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS escalations (
+    thread_id TEXT PRIMARY KEY,
+    checkpoint_id TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    verdict TEXT,
+    escape_hatch_triggered INTEGER NOT NULL,
+    paused_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS escalations_paused_at ON escalations (paused_at, thread_id);
+CREATE INDEX IF NOT EXISTS escalations_verdict ON escalations (verdict, paused_at, thread_id);
+"""
+
+# Payloads above this size are zlib-compressed; the debate transcript compresses very well
+_COMPRESS_MIN_BYTES = 512
+# A list value is stored whole again after this many consecutive deltas, which bounds read cost
+_MAX_DELTA_CHAIN = 32
+# Threads whose latest channel values are kept in memory to compute deltas against
+_DELTA_CACHE_THREADS = 4_096
+_SUMMARY_CHARS = 160
+
+
+def _waiting_on(checkpoint: Checkpoint, node: str) -> bool:
+    """Whether `node` is triggered in `checkpoint` but has not run yet, i.e. the thread is paused before it."""
+    channel = f"branch:to:{node}"
+    if channel not in checkpoint["channel_values"]:
+        return False  # never triggered, or the trigger was consumed (by the node or a state update as the node)
+    version = checkpoint["channel_versions"].get(channel)
+    seen = checkpoint["versions_seen"].get(node, {}).get(channel)
+    return version is not None and (seen is None or version > seen)
+
+
+def _summary(query: str | None) -> str:
+    text = " ".join((query or "").split())
+    return text if len(text) <= _SUMMARY_CHARS else text[: _SUMMARY_CHARS - 1] + "…"
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver[str]):
+    """File-backed checkpointer with per-thread retention, compact blobs and batched commits.
+
+    Writes of a superstep are buffered in the open transaction and committed together with the
+    next checkpoint (or every `commit_every` checkpoints for higher write throughput, at the cost
+    of losing the uncommitted tail on a crash). A single connection guarded by a lock is shared
+    by all threads and asyncio tasks; the async methods run the sync ones in a worker thread, so
+    SQLite and zlib work never blocks the event loop.
+    """
+
+    def __init__(
+        self, path: str, keep_last: int = 5, commit_every: int = 1, *, escalation_node: str | None = None, serde=None
+    ):
+        super().__init__(serde=serde)
+        self.path = path
+        self.keep_last = keep_last
+        self.commit_every = commit_every
+        self.escalation_node = escalation_node
+        self._uncommitted_puts = 0
+        # (thread_id, checkpoint_ns) -> (latest checkpoint_id, {channel: (version, value, chain length, root version)})
+        self._latest = OrderedDict()
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        indexed = self._conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'escalations'").fetchone()
+        self._conn.executescript(_SCHEMA)
+        if escalation_node and not indexed:
+            self.reindex_escalations()  # a store written before the index existed
+
+    @classmethod
+    def from_env(cls, default_path: str, **kwargs) -> "SqliteCheckpointSaver":
+        return cls(
+            os.environ.get("CHECKPOINT_DB", default_path),
+            keep_last=int(os.environ.get("CHECKPOINT_KEEP_LAST", 5)),
+            commit_every=int(os.environ.get("CHECKPOINT_COMMIT_EVERY", 1)),
+            **kwargs,
+        )
+
+    # Serialization
+    def _dumps(self, value: Any) -> tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(value)
+        if len(data) >= _COMPRESS_MIN_BYTES:
+            return f"{type_}+zlib", zlib.compress(data, 6)
+        return type_, data
+
+    def _loads(self, type_: str, data: bytes) -> Any:
+        if type_.endswith("+zlib"):
+            type_, data = type_[: -len("+zlib")], zlib.decompress(data)
+        return self.serde.loads_typed((type_, data))
+
+    def _tuple(self, row, config: RunnableConfig | None = None) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, checkpoint, metadata_type, metadata = row
+        writes = self._conn.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_path, task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        checkpoint = self._loads(type_, checkpoint)
+        # Checkpoints written before per-channel blobs carry their values inline
+        checkpoint["channel_values"] = {
+            **checkpoint.get("channel_values", {}),
+            **self._load_channel_values(thread_id, checkpoint_ns, checkpoint["channel_versions"]),
+        }
+        return CheckpointTuple(
+            config=config or {
+                "configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}
+            },
+            checkpoint=checkpoint,
+            metadata=self._loads(metadata_type, metadata),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+                if parent_id
+                else None
+            ),
+            pending_writes=[(task_id, channel, self._loads(t, value)) for task_id, channel, t, value in writes],
+        )
+
+    # Per-channel blobs
+    def _encode_channels(
+        self, thread_id: str, checkpoint_ns: str, parent_id: str | None, checkpoint: Checkpoint, new_versions: ChannelVersions
+    ) -> list[tuple]:
+        """Blob rows for the channels changed by this checkpoint: deltas for grown lists, whole values otherwise."""
+        key = (thread_id, checkpoint_ns)
+        latest_id, latest = self._latest.pop(key, (None, {}))
+        # Deltas only build on the checkpoint this one follows; a fork from an older one starts over
+        previous = latest if parent_id is not None and parent_id == latest_id else {}
+        current = {channel: entry for channel, entry in previous.items() if channel not in new_versions}
+        values = checkpoint["channel_values"]
+        rows = []
+        for channel, version in new_versions.items():
+            if channel not in values:
+                rows.append((thread_id, checkpoint_ns, channel, version, None, version, "empty", b""))
+                current.pop(channel, None)
+                continue
+            value = values[channel]
+            base = previous.get(channel)
+            if (
+                base is not None
+                and isinstance(value, list)
+                and isinstance(base[1], list)
+                and base[2] < _MAX_DELTA_CHAIN
+                and len(value) >= len(base[1])
+                and value[: len(base[1])] == base[1]
+            ):
+                type_, data = self._dumps(value[len(base[1]):])
+                rows.append((thread_id, checkpoint_ns, channel, version, base[0], base[3], type_, data))
+                current[channel] = (version, value, base[2] + 1, base[3])
+            else:
+                type_, data = self._dumps(value)
+                rows.append((thread_id, checkpoint_ns, channel, version, None, version, type_, data))
+                current[channel] = (version, value, 0, version)
+        self._latest[key] = (checkpoint["id"], current)
+        while len(self._latest) > _DELTA_CACHE_THREADS:
+            self._latest.popitem(last=False)
+        return rows
+
+    def _load_channel_values(self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> dict[str, Any]:
+        values = {}
+        for channel, version in versions.items():
+            row = self._conn.execute(
+                "SELECT base_version, root_version, type, value FROM blobs "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, version),
+            ).fetchone()
+            if row is None or row[2] == "empty":
+                continue
+            base_version, root_version, type_, data = row
+            if base_version is None:
+                values[channel] = self._loads(type_, data)
+                continue
+            # A delta: walk back to the whole value at the root of its chain, then re-append in order
+            chain = {
+                v: (base, t, d)
+                for v, base, t, d in self._conn.execute(
+                    "SELECT version, base_version, type, value FROM blobs "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version >= ? AND version <= ?",
+                    (thread_id, checkpoint_ns, channel, root_version, version),
+                )
+            }
+            parts, current = [], version
+            while current is not None and current in chain:
+                base, t, d = chain[current]
+                parts.append((t, d))
+                current = base
+            if current is not None:
+                continue  # broken chain (a base was deleted); the channel reads as empty
+            value = []
+            for t, d in reversed(parts):
+                value.extend(self._loads(t, d))
+            values[channel] = value
+        return values
+
+    # BaseCheckpointSaver interface
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self._conn.execute(
+                    f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+                return self._tuple(row, config) if row else None
+            row = self._conn.execute(
+                f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+            return self._tuple(row) if row else None
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                f"metadata_type, metadata FROM checkpoints {where} ORDER BY thread_id, checkpoint_id DESC",
+                params,
+            ).fetchall()
+        for row in rows:
+            if limit is not None and limit <= 0:
+                break
+            with self._lock:
+                checkpoint_tuple = self._tuple(row)
+            if filter and not all(checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            yield checkpoint_tuple
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+        type_, data = self._dumps({**checkpoint, "channel_values": {}})
+        metadata_type, metadata_data = self._dumps(get_checkpoint_metadata(config, metadata))
+        with self._lock:
+            blob_rows = self._encode_channels(thread_id, checkpoint_ns, parent_id, checkpoint, new_versions)
+            metrics.observe("debate_checkpoint_bytes", len(data) + sum(len(row[-1]) for row in blob_rows))
+            self._conn.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)", blob_rows)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id, checkpoint_ns, checkpoint["id"], parent_id,
+                    type_, data, metadata_type, metadata_data, time.time(),
+                ),
+            )
+            if self.escalation_node and not checkpoint_ns:
+                self._index_escalation(thread_id, checkpoint)
+            self._apply_retention(thread_id, checkpoint_ns)
+            self._uncommitted_puts += 1
+            if self._uncommitted_puts >= self.commit_every:
+                self.flush()
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, data = self._dumps(value)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, task_path, WRITES_IDX_MAP.get(channel, idx), channel, type_, data))
+        # Regular writes are idempotent (first one wins); special writes (errors, interrupts) overwrite
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [r for r in rows if r[5] >= 0]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [r for r in rows if r[5] < 0]
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            self._conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+            self._conn.execute("DELETE FROM blobs WHERE thread_id = ?", (thread_id,))
+            self._conn.execute("DELETE FROM escalations WHERE thread_id = ?", (thread_id,))
+            for key in [key for key in self._latest if key[0] == thread_id]:
+                del self._latest[key]
+            self.flush()
+
+    def prune(self, thread_ids: Sequence[str], *, strategy: str = "keep_latest") -> None:
+        with self._lock:
+            for thread_id in thread_ids:
+                if strategy == "delete":
+                    self.delete_thread(thread_id)
+                    continue
+                for (checkpoint_ns,) in self._conn.execute(
+                    "SELECT DISTINCT checkpoint_ns FROM checkpoints WHERE thread_id = ?", (thread_id,)
+                ).fetchall():
+                    self._apply_retention(thread_id, checkpoint_ns, keep=1)
+            self.flush()
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = self.list(config, filter=filter, before=before, limit=limit)
+        # Each checkpoint is read and decoded in a worker thread, one at a time
+        while (item := await asyncio.to_thread(next, items, None)) is not None:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path: str = "") -> None:
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    async def aprune(self, thread_ids: Sequence[str], *, strategy: str = "keep_latest") -> None:
+        return await asyncio.to_thread(self.prune, thread_ids, strategy=strategy)
+
+    # Same zero-padded string versions as InMemorySaver, which compare correctly as text
+    get_next_version = InMemorySaver.get_next_version
+
+    # Escalation index
+    def _index_escalation(self, thread_id: str, checkpoint: Checkpoint, paused_at: float | None = None):
+        """Adds the thread to the escalation index while it is paused before `escalation_node`, removes it otherwise."""
+        if not _waiting_on(checkpoint, self.escalation_node):
+            self._conn.execute("DELETE FROM escalations WHERE thread_id = ?", (thread_id,))
+            return
+        values = checkpoint["channel_values"]
+        # Later checkpoints of a thread that is still paused (e.g. a state edit) keep its place in the queue
+        self._conn.execute(
+            "INSERT INTO escalations VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (thread_id) DO UPDATE SET "
+            "checkpoint_id = excluded.checkpoint_id, summary = excluded.summary, verdict = excluded.verdict, "
+            "escape_hatch_triggered = excluded.escape_hatch_triggered",
+            (
+                thread_id, checkpoint["id"], _summary(values.get("query")), values.get("verdict"),
+                int(bool(values.get("escape_hatch_triggered"))), paused_at or time.time(),
+            ),
+        )
+
+    def escalations(self, limit: int = 50, cursor: str | None = None, verdict: str | None = None) -> tuple[Sequence[dict], str | None]:
+        """One page of paused threads, longest waiting first, and the cursor of the next page (None on the last).
+
+        Pages are keyset-paginated on (paused_at, thread_id), so every page costs the same however
+        deep into the queue it is and however many threads are paused.
+        """
+        clauses, params = [], []
+        if verdict is not None:
+            clauses.append("verdict = ?")
+            params.append(verdict)
+        if cursor:
+            paused_at, _, thread_id = cursor.partition(":")
+            clauses.append("(paused_at, thread_id) > (?, ?)")
+            params += [float(paused_at), thread_id]
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT thread_id, checkpoint_id, summary, verdict, escape_hatch_triggered, paused_at FROM escalations "
+                f"{where} ORDER BY paused_at, thread_id LIMIT ?",
+                [*params, limit + 1],
+            ).fetchall()
+        items = [
+            {
+                "thread_id": thread_id, "checkpoint_id": checkpoint_id, "summary": summary, "verdict": verdict,
+                "escape_hatch_triggered": bool(escape_hatch), "paused_at": paused_at,
+            }
+            for thread_id, checkpoint_id, summary, verdict, escape_hatch, paused_at in rows[:limit]
+        ]
+        next_cursor = f"{items[-1]['paused_at']!r}:{items[-1]['thread_id']}" if len(rows) > limit else None
+        return items, next_cursor
+
+    def escalation_count(self, verdict: str | None = None) -> int:
+        with self._lock:
+            if verdict is None:
+                return self._conn.execute("SELECT COUNT(*) FROM escalations").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM escalations WHERE verdict = ?", (verdict,)).fetchone()[0]
+
+    def reindex_escalations(self) -> int:
+        """Rebuilds the escalation index from the latest checkpoint of every thread; returns the paused count."""
+        with self._lock:
+            self._conn.execute("DELETE FROM escalations")
+            latest = self._conn.execute(
+                "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, "
+                "metadata, MAX(checkpoint_id), created_at FROM checkpoints WHERE checkpoint_ns = '' GROUP BY thread_id"
+            ).fetchall()
+            for row in latest:
+                self._index_escalation(row[0], self._tuple(row[:8]).checkpoint, paused_at=row[9])
+            self.flush()
+        return self.escalation_count()
+
+    # Retention and maintenance
+    def _apply_retention(self, thread_id: str, checkpoint_ns: str, keep: int | None = None):
+        """Deletes all but the newest `keep` checkpoints of a thread (and their writes and unreferenced blobs)."""
+        keep = keep or self.keep_last
+        stale = self._conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+            (thread_id, checkpoint_ns, keep),
+        ).fetchall()
+        if stale:
+            params = [(thread_id, checkpoint_ns, checkpoint_id) for (checkpoint_id,) in stale]
+            self._conn.executemany(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", params
+            )
+            self._conn.executemany(
+                "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", params
+            )
+            self._delete_unreferenced_blobs(thread_id, checkpoint_ns)
+
+    def _delete_unreferenced_blobs(self, thread_id: str, checkpoint_ns: str):
+        """Deletes, per channel, the blobs older than the oldest chain root a retained checkpoint still reads."""
+        referenced = set()
+        for type_, data in self._conn.execute(
+            "SELECT type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?", (thread_id, checkpoint_ns)
+        ):
+            referenced.update(self._loads(type_, data)["channel_versions"].items())
+        if not referenced:
+            return
+        oldest_root = {}
+        for channel, version in referenced:
+            row = self._conn.execute(
+                "SELECT root_version FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, version),
+            ).fetchone()
+            if row is not None and (channel not in oldest_root or row[0] < oldest_root[channel]):
+                oldest_root[channel] = row[0]
+        self._conn.executemany(
+            "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version < ?",
+            [(thread_id, checkpoint_ns, channel, root) for channel, root in oldest_root.items()],
+        )
+
+    def flush(self):
+        """Commits buffered writes and checkpoints."""
+        with self._lock:
+            self._conn.commit()
+            self._uncommitted_puts = 0
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+    def thread_ids_idle_since(self, cutoff: float) -> Sequence[str]:
+        with self._lock:
+            return [
+                thread_id
+                for (thread_id,) in self._conn.execute(
+                    "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(created_at) < ?", (cutoff,)
+                ).fetchall()
+            ]
+
+    def compact(self, ttl_seconds: float) -> dict:
+        """Deletes threads idle for longer than `ttl_seconds`, then reclaims disk space.
+
+        Threads paused before `escalation_node` are kept, as listed by the escalation index. Any
+        other thread is deleted, including one that stopped mid-node (e.g. a crashed run).
+        """
+        with self._lock:
+            paused = {thread_id for (thread_id,) in self._conn.execute("SELECT thread_id FROM escalations")}
+        deleted = kept = 0
+        for thread_id in self.thread_ids_idle_since(time.time() - ttl_seconds):
+            if thread_id in paused:
+                kept += 1
+                continue
+            self.delete_thread(thread_id)
+            deleted += 1
+        with self._lock:
+            self.flush()
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
+        return {"deleted_threads": deleted, "kept_paused_threads": kept}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the SQLite checkpoint store.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    compact = subcommands.add_parser("compact", help="delete expired finished threads and reclaim disk space")
+    compact.add_argument("--ttl", type=float, default=float(os.environ.get("CHECKPOINT_TTL_SECONDS", 7 * 86_400)),
+                         help="seconds a finished thread is kept after its last checkpoint (default: CHECKPOINT_TTL_SECONDS)")
+    subcommands.add_parser("reindex-escalations", help="rebuild the index of threads paused for human review")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    if args.command == "reindex-escalations":
+        from src.graph import get_checkpointer
+        print({"paused_threads": get_checkpointer().reindex_escalations()})
+        return
+    from src.graph import compact_checkpoints
+    print(compact_checkpoints(args.ttl))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+"""Near-duplicate ticket coalescing for bulk runs (batch and service modes).
+
+Tickets are normalized (case, punctuation, whitespace, and volatile tokens such as emails, order
+numbers, amounts and dates replaced by placeholders) and sketched with MinHash over word shingles.
+LSH banding finds candidate clusters, and a ticket joins one when its estimated Jaccard similarity
+with the cluster's representative reaches COALESCE_THRESHOLD. Only tickets with the same risk
+profile share a cluster: the same `score_risk` signals and the same order of magnitude of the
+largest amount, so a $40,000 claim never reuses the answer to a $40 one. Tickets scoring at or
+above COALESCE_MAX_RISK are never coalesced and always get their own debate.
+
+Only the representative runs the debate graph. Once it PASSes, every other member gets its
+verified draft: verbatim when the member's text is identical, otherwise adapted to the member's
+ticket by a single personalization call that keeps the approved commitments, and then checked by
+the judge's fast-path review before it is labelled PASS. A representative that does not pass
+(FAIL, escalation, error), a failed personalization or a failed check shares nothing; those
+members run the graph on their own.
+
+    python -m src.batch tickets.jsonl results.jsonl --coalesce
+"""
+import asyncio
+import hashlib
+import math
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict, deque
+from typing import AsyncIterator, Iterable
+
+from langchain_core.messages import HumanMessage
+
+from src.graph import DraftResponse, JudgeResponse, _judge_messages, get_llm, prompts, score_risk
+from src.runner import TicketUsage, _ticket_config, _token_totals, arun_ticket
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_VOLATILE = [
+    (re.compile(r"\S+@\S+\.\w+"), " email "),
+    (re.compile(r"[$€£]\s?\d[\d,.]*|\d[\d,.]*\s?(?:usd|eur|gbp|dollars|euros)\b"), " amount "),
+    (re.compile(r"\b\d{1,4}[/.-]\d{1,2}[/.-]\d{1,4}\b"), " date "),
+    (re.compile(r"\b[a-z]*\d[a-z\d-]*\b"), " number "),
+]
+_AMOUNT = re.compile(r"[$€£]\s?(\d[\d,]*(?:\.\d+)?)|(\d[\d,]*(?:\.\d+)?)\s?(?:usd|eur|gbp|dollars|euros)\b")
+
+
+def risk_profile(text: str) -> tuple[float, tuple]:
+    """The ticket's risk score, and the key only tickets of the same risk may share a cluster under.
+
+    The key is the `score_risk` signals plus the order of magnitude of the largest amount, which
+    normalization replaces by a placeholder.
+    """
+    risk_score, signals = score_risk(text)
+    amounts = [float((a or b).replace(",", "")) for a, b in _AMOUNT.findall(text.lower())]
+    magnitude = int(math.log10(max(amounts))) if amounts and max(amounts) >= 1 else None
+    return risk_score, (tuple(sorted(signals)), magnitude)
+
+
+def normalize(text: str) -> str:
+    text = text.lower()
+    for pattern, placeholder in _VOLATILE:
+        text = pattern.sub(placeholder, text)
+    return " ".join(re.findall(r"[a-z]+", text))
+
+
+class MinHasher:
+    """MinHash signatures of word shingles, with `bands` LSH band keys per signature."""
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle_words: int = 3, seed: int = 1):
+        rng = random.Random(seed)
+        self.rows = num_perm // bands
+        self.bands = bands
+        self.shingle_words = shingle_words
+        self._perms = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(_MERSENNE_PRIME)) for _ in range(self.rows * bands)]
+
+    def signature(self, normalized: str) -> tuple[int, ...]:
+        words = normalized.split()
+        k = min(self.shingle_words, len(words)) or 1
+        shingles = {
+            int.from_bytes(hashlib.blake2b(" ".join(words[i:i + k]).encode(), digest_size=8).digest(), "big")
+            for i in range(max(len(words) - k + 1, 1))
+        }
+        return tuple(min((a * x + b) % _MERSENNE_PRIME for x in shingles) for a, b in self._perms)
+
+    def band_keys(self, signature: tuple[int, ...], prefix: tuple = ()) -> list[tuple]:
+        """LSH band keys; tickets whose keys share no `prefix` are never candidates for each other."""
+        return [(*prefix, band, signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    @staticmethod
+    def similarity(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of the two shingle sets."""
+        return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class Cluster:
+    def __init__(self, representative: dict, signature: tuple[int, ...], band_keys: list[tuple]):
+        self.id = uuid.uuid4().hex
+        self.representative = representative
+        self.signature = signature
+        self.band_keys = band_keys
+        self.created_at = time.time()
+        self.members = 0
+        self.result = None  # what members reuse of the representative's run, once finished
+        self.owner = None   # what runs the representative, e.g. a service job
+
+    def finish(self, result: dict):
+        """Keeps what members reuse from the representative's result; its full state is not held on to."""
+        state = result.get("state") or {}
+        self.result = {
+            "thread_id": result.get("thread_id"),
+            "error": result.get("error"),
+            "interrupted": result.get("interrupted", False),
+            "llm_calls": result.get("llm_calls", 0),
+            "draft": state.get("draft"),
+            "sources_cited": state.get("sources_cited", []),
+            "verdict": state.get("verdict"),
+            "debate_synthesis": state.get("debate_synthesis"),
+        }
+
+
+class TicketCoalescer:
+    """Assigns tickets to clusters of near-duplicates and counts what coalescing saved.
+
+    Clusters older than `max_age_s` (None: never, as in a batch run) or beyond the newest
+    `max_clusters` are forgotten, so later tickets start new clusters instead of reusing stale answers.
+    """
+
+    def __init__(
+        self,
+        threshold: float | None = None,
+        personalize: bool | None = None,
+        max_age_s: float | None = None,
+        max_clusters: int = 10_000,
+        hasher: MinHasher | None = None,
+        max_risk: float | None = None,
+    ):
+        self.threshold = threshold if threshold is not None else float(os.environ.get("COALESCE_THRESHOLD", 0.8))
+        self.max_risk = max_risk if max_risk is not None else float(os.environ.get("COALESCE_MAX_RISK", 0.8))
+        if personalize is None:
+            personalize = os.environ.get("COALESCE_PERSONALIZE", "true").strip().lower() not in ("0", "false", "no", "off")
+        self.personalize = personalize
+        self.max_age_s = max_age_s
+        self.max_clusters = max_clusters
+        self.hasher = hasher or MinHasher()
+        self._clusters = OrderedDict()
+        self._index = defaultdict(set)  # band key -> cluster ids
+        self._lock = threading.Lock()
+        self.counts = {
+            "tickets": 0, "clusters": 0, "high_risk": 0, "verbatim": 0, "personalized": 0, "unshared": 0, "llm_calls_saved": 0,
+        }
+
+    def assign(self, ticket: dict) -> tuple[Cluster, bool]:
+        """The ticket's cluster, and whether the ticket is its representative (a new cluster)."""
+        risk_score, risk_key = risk_profile(ticket["query"])
+        signature = self.hasher.signature(normalize(ticket["query"]))
+        band_keys = self.hasher.band_keys(signature, risk_key)
+        with self._lock:
+            self._expire()
+            self.counts["tickets"] += 1
+            if risk_score >= self.max_risk:
+                # A cluster of its own that no other ticket can find: high-risk tickets always get their own debate
+                self.counts["high_risk"] += 1
+                return Cluster(ticket, signature, []), True
+            candidates = {cluster_id for key in band_keys for cluster_id in self._index.get(key, ())}
+            best, best_similarity = None, self.threshold
+            for cluster_id in candidates:
+                cluster = self._clusters[cluster_id]
+                similarity = self.hasher.similarity(signature, cluster.signature)
+                if similarity >= best_similarity:
+                    best, best_similarity = cluster, similarity
+            if best is not None:
+                best.members += 1
+                return best, False
+            cluster = Cluster(ticket, signature, band_keys)
+            self._clusters[cluster.id] = cluster
+            for key in band_keys:
+                self._index[key].add(cluster.id)
+            self.counts["clusters"] += 1
+            return cluster, True
+
+    def _expire(self):
+        now = time.time()
+        while self._clusters:
+            cluster = next(iter(self._clusters.values()))
+            expired = self.max_age_s is not None and now - cluster.created_at > self.max_age_s
+            if not expired and len(self._clusters) <= self.max_clusters:
+                break
+            del self._clusters[cluster.id]
+            for key in cluster.band_keys:
+                ids = self._index[key]
+                ids.discard(cluster.id)
+                if not ids:
+                    del self._index[key]
+
+    def record(self, cluster: Cluster, result: dict | None):
+        """Counts a member's outcome: the reused result, or None when it had to run the graph itself."""
+        with self._lock:
+            if result is None:
+                self.counts["unshared"] += 1
+                return
+            self.counts[result["reuse"]] += 1
+            self.counts["llm_calls_saved"] += max(cluster.result.get("llm_calls", 0) - result["llm_calls"], 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        coalesced = counts["verbatim"] + counts["personalized"]
+        return {
+            **counts,
+            "coalesced": coalesced,
+            # Share of tickets answered from another ticket's debate instead of their own
+            "coalescing_ratio": round(coalesced / counts["tickets"], 4) if counts["tickets"] else 0,
+        }
+
+
+def _shareable(result: dict | None) -> bool:
+    return bool(result) and not result["error"] and not result["interrupted"] and result["verdict"] == "PASS"
+
+
+def _check_messages(ticket: dict, draft: str, sources_cited: list[str], config: dict | None):
+    # The judge's fast-path review of a draft against the member's own query
+    return _judge_messages(
+        {"triage": "fast", "query": ticket["query"], "draft": draft, "sources_cited": sources_cited}, config or {}
+    )
+
+
+def _personalize_messages(ticket: dict, representative: dict):
+    return [prompts.system_message("personalize_prompt.md"), HumanMessage(content=(
+        f"Customer Ticket:\n{ticket['query']}\n\n"
+        f"Approved Resolution:\n{representative['draft'] or ''}\n\n"
+        f"Approved Sources:\n{', '.join(representative['sources_cited'])}"
+    ))]
+
+
+async def areuse(ticket: dict, cluster: Cluster, coalescer: TicketCoalescer, config: dict | None = None) -> dict | None:
+    """A result for `ticket` built from its cluster representative's PASS, or None if that cannot be shared."""
+    representative = cluster.result
+    if not _shareable(representative):
+        coalescer.record(cluster, None)
+        return None
+    thread_id = ticket.get("thread_id") or f"ticket_{uuid.uuid4().hex}"
+    usage_handler = TicketUsage()
+    start = time.perf_counter()
+    draft, sources_cited, reuse = representative["draft"], representative["sources_cited"], "verbatim"
+    verdict, debate_synthesis = representative["verdict"], representative["debate_synthesis"]
+    if ticket["query"].strip() != cluster.representative["query"].strip():
+        # The draft was judged for another ticket: adapt it (unless disabled) and judge it for this one
+        run_config = _ticket_config(config, thread_id, usage_handler)
+        try:
+            if coalescer.personalize:
+                response = await get_llm(DraftResponse, run_config).ainvoke(_personalize_messages(ticket, representative), run_config)
+                draft, sources_cited, reuse = response.draft, response.sources_cited, "personalized"
+            check = await get_llm(JudgeResponse, run_config).ainvoke(
+                _check_messages(ticket, draft, sources_cited, run_config), run_config
+            )
+        except Exception:
+            check = None
+        if check is None or check.verdict != "PASS":
+            coalescer.record(cluster, None)
+            return None  # the member runs the full graph instead
+        verdict, debate_synthesis = check.verdict, check.debate_synthesis
+    risk_score, risk_signals = score_risk(ticket["query"])
+    result = {
+        "ticket": ticket,
+        "thread_id": thread_id,
+        "state": {
+            "query": ticket["query"],
+            "draft": draft,
+            "sources_cited": sources_cited,
+            "verdict": verdict,
+            "debate_synthesis": debate_synthesis,
+            "risk_score": risk_score,
+            "risk_signals": risk_signals,
+        },
+        "interrupted": False,
+        "error": None,
+        "latency_s": time.perf_counter() - start,
+        **_token_totals(usage_handler.usage_metadata),
+        "llm_calls": usage_handler.llm_calls,
+        "coalesced_with": representative["thread_id"],
+        "reuse": reuse,
+    }
+    coalescer.record(cluster, result)
+    return result
+
+
+async def arun_coalesced(
+    tickets: Iterable[dict],
+    coalescer: TicketCoalescer,
+    max_concurrency: int | None = None,
+    graph=None,
+    config: dict | None = None,
+) -> AsyncIterator[dict]:
+    """Like `src.runner.arun_tickets`, but near-duplicates of a running ticket wait for its result and reuse it.
+
+    Parked members do not count towards `max_concurrency`; at most `100 * max_concurrency` are
+    held at once, after which new tickets are pulled only as clusters finish.
+    """
+    if max_concurrency is None:
+        max_concurrency = int(os.environ.get("MAX_CONCURRENT_TICKETS", 8))
+    max_parked = 100 * max_concurrency
+    pending = {}                  # task -> ("graph" | "reuse", cluster or None, ticket)
+    parked = defaultdict(list)    # cluster id -> members waiting for the representative
+    parked_count = 0
+    ready = deque()
+    ticket_iter = iter(tickets)
+    exhausted = False
+
+    def start(kind: str, cluster: Cluster | None, ticket: dict):
+        work = arun_ticket(ticket, graph, config) if kind == "graph" else areuse(ticket, cluster, coalescer, config)
+        pending[asyncio.create_task(work)] = (kind, cluster, ticket)
+
+    try:
+        while True:
+            while len(pending) < max_concurrency and (ready or (not exhausted and parked_count < max_parked)):
+                if ready:
+                    start(*ready.popleft())
+                    continue
+                try:
+                    ticket = next(ticket_iter)
+                except StopIteration:
+                    exhausted = True
+                    break
+                cluster, is_representative = coalescer.assign(ticket)
+                if is_representative:
+                    start("graph", cluster, ticket)
+                elif cluster.result is not None:
+                    start("reuse", cluster, ticket)
+                else:
+                    parked[cluster.id].append(ticket)
+                    parked_count += 1
+            if not pending:
+                return
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                kind, cluster, ticket = pending.pop(task)
+                result = task.result()
+                if kind == "reuse" and result is None:
+                    ready.append(("graph", None, ticket))  # not shareable: the member runs on its own
+                    continue
+                if kind == "graph" and cluster is not None:
+                    cluster.finish(result)
+                    members = parked.pop(cluster.id, [])
+                    parked_count -= len(members)
+                    ready.extend(("reuse", cluster, member) for member in members)
+                yield result
+    finally:
+        for task in pending:
+            task.cancel()
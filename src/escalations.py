@@ -0,0 +1,128 @@
+"""Manager review queue: tickets paused before human escalation, listed from an index and handled in bulk.
+
+The graph pauses before `human_escalation` (interrupt_before). SqliteCheckpointSaver indexes every
+thread while it waits there (thread_id, ticket summary, verdict, escape hatch, time paused), so the
+queue is listed with a keyset-paginated query instead of loading every thread's checkpoints, and
+stays fast with tens of thousands of paused threads. A thread leaves the index as soon as a later
+checkpoint shows it has moved on, whichever way it was handled.
+
+Bulk actions take a list of thread ids and report an outcome per thread; threads that are no
+longer paused are skipped as "not_paused":
+
+* approve: the manager accepts the draft (optionally edited). The verdict becomes PASS and the
+  thread ends as if the escalation node had run, through `graph.update_state`.
+* reject: the ticket is closed with verdict FAIL and the manager's note as its final draft.
+* resume: optionally edits the state, then resumes the graph into `human_escalation` as usual.
+
+    python -m src.escalations list --limit 20
+    python -m src.escalations approve ticket_1 ticket_2
+    python -m src.escalations reject ticket_3 --note "Refund declined: outside the return window."
+"""
+import argparse
+import asyncio
+import json
+import os
+
+from src.graph import get_checkpointer, get_graph
+from src.metrics import metrics
+
+ESCALATION_NODE = "human_escalation"
+REJECTED_DRAFT = "[SYSTEM: Rejected by a Human Manager.]"
+
+
+def list_escalations(limit: int = 50, cursor: str | None = None, verdict: str | None = None, checkpointer=None) -> dict:
+    """One page of the review queue, longest waiting first: {"items", "next_cursor", "total"}."""
+    checkpointer = checkpointer or get_checkpointer()
+    items, next_cursor = checkpointer.escalations(limit, cursor, verdict)
+    return {"items": items, "next_cursor": next_cursor, "total": checkpointer.escalation_count(verdict)}
+
+
+async def _handle(graph, thread_id: str, action: str, values: dict | None) -> dict:
+    config = {"configurable": {"thread_id": thread_id}}
+    snapshot = await graph.aget_state(config)
+    if ESCALATION_NODE not in snapshot.next:
+        return {"status": "not_paused"}
+    if action == "resume":
+        if values:
+            await graph.aupdate_state(config, values)
+        await graph.ainvoke(None, config)
+        snapshot = await graph.aget_state(config)
+        metrics.inc("debate_escalations_resolved_total", action=action)
+        return {"status": "resumed", "interrupted": bool(snapshot.next), "draft": snapshot.values.get("draft")}
+    # Recorded as the escalation node's own output, so the thread ends without running it
+    values = dict(values)
+    if speculative := snapshot.values.get("speculative_draft"):
+        # Like the escalation node, drop the redraft that was never applied and count its tokens as wasted
+        values.update(speculative_draft=None, budget={"speculative_wasted_tokens": speculative["tokens"]})
+    await graph.aupdate_state(config, values, as_node=ESCALATION_NODE)
+    metrics.inc("debate_escalations_resolved_total", action=action)
+    return {"status": "approved" if action == "approve" else "rejected"}
+
+
+async def _handle_all(thread_ids, action: str, values: dict | None, graph, max_concurrency: int | None) -> dict[str, dict]:
+    graph = graph or get_graph()
+    if max_concurrency is None:
+        max_concurrency = int(os.environ.get("MAX_CONCURRENT_TICKETS", 8))
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def handle(thread_id: str) -> dict:
+        async with semaphore:
+            try:
+                return await _handle(graph, thread_id, action, values)
+            except Exception as e:
+                # One bad thread must not stop the rest of the batch
+                return {"status": "error", "error": f"{type(e).__name__}: {e}"}
+
+    thread_ids = list(dict.fromkeys(thread_ids))
+    outcomes = await asyncio.gather(*(handle(thread_id) for thread_id in thread_ids))
+    return dict(zip(thread_ids, outcomes))
+
+
+async def aapprove(thread_ids, draft: str | None = None, graph=None, max_concurrency: int | None = None) -> dict[str, dict]:
+    """Approves each paused thread's draft (or replaces it with `draft`) and ends the thread with verdict PASS."""
+    values = {"verdict": "PASS", **({"draft": draft} if draft is not None else {})}
+    return await _handle_all(thread_ids, "approve", values, graph, max_concurrency)
+
+
+async def areject(thread_ids, note: str | None = None, graph=None, max_concurrency: int | None = None) -> dict[str, dict]:
+    """Closes each paused thread with verdict FAIL and `note` as its final draft."""
+    return await _handle_all(thread_ids, "reject", {"verdict": "FAIL", "draft": note or REJECTED_DRAFT}, graph, max_concurrency)
+
+
+async def aresume(thread_ids, values: dict | None = None, graph=None, max_concurrency: int | None = None) -> dict[str, dict]:
+    """Applies `values` (if any) to each paused thread's state, then resumes it into the escalation node."""
+    return await _handle_all(thread_ids, "resume", values, graph, max_concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List and handle tickets paused for human review.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    listing = subcommands.add_parser("list", help="one page of the review queue, longest waiting first")
+    listing.add_argument("--limit", type=int, default=50)
+    listing.add_argument("--cursor", help="next_cursor of the previous page")
+    listing.add_argument("--verdict", help="only threads with this verdict, e.g. AMBIGUOUS or FAIL")
+    approve = subcommands.add_parser("approve", help="accept the drafts and close the tickets with verdict PASS")
+    approve.add_argument("thread_ids", nargs="+")
+    approve.add_argument("--draft", help="replacement draft for every thread")
+    reject = subcommands.add_parser("reject", help="close the tickets with verdict FAIL")
+    reject.add_argument("thread_ids", nargs="+")
+    reject.add_argument("--note", help="final draft recorded on every thread")
+    resume = subcommands.add_parser("resume", help="resume the threads into the escalation node")
+    resume.add_argument("thread_ids", nargs="+")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    if args.command == "list":
+        result = list_escalations(args.limit, args.cursor, args.verdict)
+    elif args.command == "approve":
+        result = asyncio.run(aapprove(args.thread_ids, args.draft))
+    elif args.command == "reject":
+        result = asyncio.run(areject(args.thread_ids, args.note))
+    else:
+        result = asyncio.run(aresume(args.thread_ids))
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
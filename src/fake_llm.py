@@ -0,0 +1,196 @@
+"""Offline stand-in for ChatGoogleGenerativeAI, selected with LLM_BACKEND=fake.
+
+The fake model answers structured-output (tool calling) requests with schema-valid objects for
+any Pydantic schema, so the compiled graph, fallbacks, caching and usage accounting run exactly
+as they do against Gemini, only without network calls. It is meant for benchmarks, load tests
+and demos.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import typing
+import uuid
+from collections import Counter
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import ensure_config
+from pydantic import PrivateAttr
+
+_FILLER = (
+    "The customer is a long-standing VIP whose expectations around luxury craftsmanship are high, "
+    "so the resolution balances brand goodwill, the documented return policy and financial exposure "
+    "while keeping the tone warm, precise and free of promises the policy does not support."
+).split()
+
+# Judge calls per thread_id, shared by primary and fallback so scripted verdicts stay in sequence
+_verdict_calls = Counter()
+_verdict_calls_lock = threading.Lock()
+
+# System prompts already seen, standing in for the provider's implicit prefix cache: a repeated
+# system message is reported as cache_read input tokens, like Gemini's cached_content_token_count
+_seen_prefixes = set()
+
+
+class FakeRateLimitError(RuntimeError):
+    """Injected failure standing in for a provider 429 / quota error."""
+
+
+class FakeChatModel(BaseChatModel):
+    model: str = "fake"
+    latency_ms: float = 50.0
+    latency_sigma: float = 0.5
+    failure_rate: float = 0.0
+    verdicts: list[str] = ["PASS"]
+    seed: int | None = None
+    _rng: random.Random = PrivateAttr()
+
+    def model_post_init(self, __context):
+        self._rng = random.Random(self.seed)
+
+    @classmethod
+    def from_env(cls, model: str, **kwargs) -> "FakeChatModel":
+        """Builds a fake model configured by the FAKE_LLM_* environment variables."""
+        seed = os.environ.get("FAKE_LLM_SEED")
+        return cls(
+            model=model,
+            latency_ms=float(os.environ.get("FAKE_LLM_LATENCY_MS", 50)),
+            latency_sigma=float(os.environ.get("FAKE_LLM_LATENCY_SIGMA", 0.5)),
+            failure_rate=float(os.environ.get("FAKE_LLM_FAILURE_RATE", 0)),
+            verdicts=[v.strip().upper() for v in os.environ.get("FAKE_LLM_VERDICTS", "PASS").split(",") if v.strip()],
+            seed=int(seed) if seed else None,
+            **kwargs,
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        return self.bind(tool_schema=tools[0], **kwargs)
+
+    def _latency_s(self) -> float:
+        # Log-normal around the configured median, which matches the long right tail of real APIs
+        return self.latency_ms / 1000 * self._rng.lognormvariate(0, self.latency_sigma)
+
+    def _maybe_fail(self):
+        if self._rng.random() < self.failure_rate:
+            raise FakeRateLimitError(f"429 Resource has been exhausted (injected by fake model {self.model})")
+
+    def _generate(self, messages, stop=None, run_manager=None, tool_schema=None, **kwargs) -> ChatResult:
+        time.sleep(self._latency_s())
+        self._maybe_fail()
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages, tool_schema))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, tool_schema=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._latency_s())
+        self._maybe_fail()
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages, tool_schema))])
+
+    # Streaming (used when a caller streams tokens, e.g. graph.stream(stream_mode="messages")): the
+    # tool-call arguments arrive as JSON fragments, with 40% of the sampled latency before the first
+    # fragment and the rest spread across the others, like a real provider's time-to-first-token.
+    def _stream(self, messages, stop=None, run_manager=None, tool_schema=None, **kwargs):
+        latency_s = self._latency_s()
+        time.sleep(latency_s * 0.4)
+        self._maybe_fail()
+        chunks = self._chunks(self._message(messages, tool_schema))
+        for chunk in chunks:
+            yield chunk
+            time.sleep(latency_s * 0.6 / len(chunks))
+
+    async def _astream(self, messages, stop=None, run_manager=None, tool_schema=None, **kwargs):
+        latency_s = self._latency_s()
+        await asyncio.sleep(latency_s * 0.4)
+        self._maybe_fail()
+        chunks = self._chunks(self._message(messages, tool_schema))
+        for chunk in chunks:
+            yield chunk
+            await asyncio.sleep(latency_s * 0.6 / len(chunks))
+
+    @staticmethod
+    def _chunks(message: AIMessage, chunk_chars: int = 16) -> list[ChatGenerationChunk]:
+        tool_call = message.tool_calls[0]
+        args = json.dumps(tool_call["args"])
+        chunks = []
+        for start in range(0, len(args), chunk_chars):
+            first, last = start == 0, start + chunk_chars >= len(args)
+            chunks.append(ChatGenerationChunk(message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[{
+                    "name": tool_call["name"] if first else None,
+                    "args": args[start:start + chunk_chars],
+                    "id": tool_call["id"] if first else None,
+                    "index": 0,
+                }],
+                usage_metadata=message.usage_metadata if last else None,
+                response_metadata=message.response_metadata if last else {},
+            )))
+        return chunks
+
+    def _message(self, messages, tool_schema) -> AIMessage:
+        prompt = "\n".join(str(message.content) for message in messages)
+        # Deterministic per prompt, like a temperature-0 model
+        rng = random.Random(hashlib.sha256(prompt.encode()).digest())
+        args = {name: self._value(name, field.annotation, rng) for name, field in tool_schema.model_fields.items()}
+        if "verdict" in args:
+            args["verdict"] = self._next_verdict()
+            if "escape_hatch_triggered" in args:
+                args["escape_hatch_triggered"] = args["verdict"] == "AMBIGUOUS"
+        output = str(args)
+        cached_tokens = self._cached_prefix_tokens(messages)
+        return AIMessage(
+            content="",
+            tool_calls=[{"name": tool_schema.__name__, "args": args, "id": f"call_{uuid.uuid4().hex}"}],
+            usage_metadata={
+                "input_tokens": len(prompt) // 4,
+                "output_tokens": len(output) // 4,
+                "total_tokens": (len(prompt) + len(output)) // 4,
+                "input_token_details": {"cache_read": cached_tokens},
+            },
+            response_metadata={"model_name": self.model},
+        )
+
+    def _value(self, name: str, annotation, rng: random.Random):
+        if annotation is bool:
+            return False
+        if typing.get_origin(annotation) is typing.Literal:
+            return typing.get_args(annotation)[0]
+        if typing.get_origin(annotation) is list:
+            return [self._text(rng, 8) for _ in range(rng.randint(1, 3))]
+        return f"[{self.model}] {name}: " + self._text(rng, 60)
+
+    @staticmethod
+    def _text(rng: random.Random, words: int) -> str:
+        return " ".join(rng.choice(_FILLER) for _ in range(words))
+
+    @staticmethod
+    def _cached_prefix_tokens(messages) -> int:
+        if not messages or messages[0].type != "system":
+            return 0
+        prefix = str(messages[0].content)
+        key = hashlib.sha256(prefix.encode()).digest()
+        with _verdict_calls_lock:
+            if key in _seen_prefixes:
+                return len(prefix) // 4
+            _seen_prefixes.add(key)
+        return 0
+
+    def _next_verdict(self) -> str:
+        thread_id = ensure_config().get("configurable", {}).get("thread_id")
+        with _verdict_calls_lock:
+            call = _verdict_calls[thread_id]
+            _verdict_calls[thread_id] += 1
+        return self.verdicts[min(call, len(self.verdicts) - 1)]
+
+
+def reset_fake_llm():
+    """Restarts every thread's scripted verdict sequence and empties the simulated prefix cache."""
+    with _verdict_calls_lock:
+        _verdict_calls.clear()
+        _seen_prefixes.clear()
@@ -1,29 +1,205 @@
+import asyncio
+import contextvars
+import hashlib
 import os
-import operator
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
 from typing import TypedDict, Annotated
-from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import InMemorySaver
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import SystemMessage, HumanMessage
+# Provider SDKs, langgraph's graph builder and the checkpoint store are imported where they are
+# first used, so importing this module (CLIs, workers, Streamlit reruns) stays cheap
+from langgraph.constants import END
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from langchain_core.exceptions import ModelAPIError, ModelConnectionError, ModelRateLimitError, ModelTimeoutError
+from langchain_core.messages import HumanMessage
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.tracers.context import register_configure_hook
 from pydantic import BaseModel, Field
 from typing import Literal
 from pathlib import Path
 
+from src.cache import ResponseCache, get_response_cache
+from src.metrics import LLMMetricsHandler, metrics
+from src.prompts import PromptRegistry
+from src.routing import HedgedRouter
+
 # Load settings
 PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
 
-def get_llm(schema):
-    """Initializes LLM with structured outputs and an automatic fallback model for rate limits."""
-    model_name = os.environ.get("LLM_MODEL_NAME", "gemini-2.5-flash-lite")
-    fallback_model_name = os.environ.get("LLM_FALLBACK_MODEL_NAME", "gemini-3-flash-preview")
-    primary_llm = ChatGoogleGenerativeAI(model=model_name, temperature=0, max_retries=3).with_structured_output(schema)
-    fallback_llm = ChatGoogleGenerativeAI(model=fallback_model_name, temperature=0, max_retries=3).with_structured_output(schema)
-    return primary_llm.with_fallbacks([fallback_llm])
+LLM_TEMPERATURE = 0
+LLM_MAX_RETRIES = 3
+# Provider errors worth another attempt before falling back. Retried by `get_llm` rather than
+# inside the SDK, so every retry goes through the callbacks and is counted by src/metrics.py.
+_RETRYABLE_ERRORS = (ModelRateLimitError, ModelAPIError, ModelConnectionError, ModelTimeoutError)
+
+# Process-wide client registry. Every ChatGoogleGenerativeAI client sets up its own HTTP
+# transport and auth, so clients are built once per configuration and shared by all nodes,
+# threads and asyncio tasks instead of being rebuilt on every node call.
+_llm_registry = {}
+_llm_registry_lock = threading.RLock()
+
+
+def _get_or_create(key, factory):
+    client = _llm_registry.get(key)
+    if client is None:
+        with _llm_registry_lock:
+            client = _llm_registry.get(key)
+            if client is None:
+                client = _llm_registry[key] = factory()
+    return client
+
+
+# Per-run engine settings. Every knob can be set for a single run under its lowercase name in
+# config["configurable"] (e.g. {"configurable": {"thread_id": ..., "max_debate_turns": 3}}); the
+# environment variable of the same name, upper-cased, is only the process-wide default. Nothing
+# writes these back to os.environ, so one compiled graph can serve concurrent runs with different settings.
+def _flag(value) -> bool:
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+RUN_SETTINGS = {
+    "llm_backend": (str, "google"),
+    "llm_model_name": (str, "gemini-2.5-flash-lite"),
+    "llm_fallback_model_name": (str, "gemini-3-flash-preview"),  # comma-separated for a chain
+    "max_debate_turns": (int, 1),
+    "attacker_panel_size": (int, 1),
+    "transcript_mode": (str, "full"),
+    "transcript_summary_tokens": (int, 800),
+    "triage_risk_threshold": (float, 0),
+    "max_redrafts": (int, 3),
+    "max_ticket_tokens": (int, 0),
+    "max_ticket_seconds": (float, 0),
+    "speculative_redraft": (_flag, False),
+    "llm_call_timeout_s": (float, 0),
+    "llm_hedge_percentile": (float, 0),
+    "llm_adaptive_routing": (_flag, False),
+}
+
+
+def run_setting(config: RunnableConfig | None, name: str):
+    """Value of a RUN_SETTINGS knob for this run: config["configurable"] first, then the environment, then the default."""
+    cast, default = RUN_SETTINGS[name]
+    value = ((config or {}).get("configurable") or {}).get(name)
+    if value is None:
+        value = os.environ.get(name.upper(), default)
+    return cast(value)
+
+
+def _fallback_model_names(config: RunnableConfig | None) -> tuple[str, ...]:
+    value = ((config or {}).get("configurable") or {}).get("llm_fallback_model_name")
+    if isinstance(value, (list, tuple)):
+        return tuple(value)
+    return tuple(name.strip() for name in run_setting(config, "llm_fallback_model_name").split(",") if name.strip())
+
+
+def _chat_model(model_name: str, backend: str = "google"):
+    """Returns the shared base chat client for a model (reused across all output schemas).
+
+    `backend` selects the provider: "google" (Gemini) or "fake" (offline, see src/fake_llm.py).
+    When LLM_REQUESTS_PER_MINUTE is set, each model gets its own rate limiter, shared by every
+    thread and asyncio task calling that model.
+    """
+    requests_per_minute = float(os.environ.get("LLM_REQUESTS_PER_MINUTE", 0))
+
+    def build():
+        rate_limiter = None
+        if requests_per_minute > 0:
+            rate_limiter = InMemoryRateLimiter(requests_per_second=requests_per_minute / 60, check_every_n_seconds=0.05)
+        if backend == "fake":
+            from src.fake_llm import FakeChatModel
+            return FakeChatModel.from_env(model_name, rate_limiter=rate_limiter)
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        # max_retries=1 is a single attempt (0 means the SDK default); retries happen in `get_llm`
+        return ChatGoogleGenerativeAI(model=model_name, temperature=LLM_TEMPERATURE, max_retries=1, rate_limiter=rate_limiter)
+
+    return _get_or_create(("chat", backend, model_name, LLM_TEMPERATURE, LLM_MAX_RETRIES, requests_per_minute), build)
+
+
+def _with_response_cache(llm, cache: ResponseCache, backend: str, cache_model_name: str, schema):
+    """Serves repeated prompts from the response cache and stores fresh responses in it."""
+    def invoke(messages):
+        key = cache.key(backend, cache_model_name, schema, messages)
+        response = cache.get(key, schema)
+        if response is None:
+            response = llm.invoke(messages)
+            cache.put(key, response)
+        return response
+
+    async def ainvoke(messages):
+        key = cache.key(backend, cache_model_name, schema, messages)
+        response = cache.get(key, schema)
+        if response is None:
+            response = await llm.ainvoke(messages)
+            cache.put(key, response)
+        return response
+
+    return RunnableLambda(invoke, afunc=ainvoke, name="cached_llm")
+
+
+def get_llm(schema, config: RunnableConfig | None = None):
+    """Returns the shared LLM with structured outputs and automatic fallback models for rate limits.
+
+    The backend, primary model and fallback chain come from the run's config (see RUN_SETTINGS).
+    With a per-call timeout, a hedge percentile or adaptive routing set, calls go through a
+    HedgedRouter (src/routing.py) instead of plain fallbacks. When LLM_CACHE_PATH is set,
+    identical prompts are answered from the persistent response cache.
+    """
+    backend = run_setting(config, "llm_backend")
+    model_name = run_setting(config, "llm_model_name")
+    fallback_model_names = _fallback_model_names(config)
+    routing = (
+        run_setting(config, "llm_hedge_percentile"),
+        run_setting(config, "llm_call_timeout_s"),
+        run_setting(config, "llm_adaptive_routing"),
+    )
+    cache = get_response_cache()
+
+    def structured(name: str, role: str):
+        llm = _chat_model(name, backend).with_structured_output(schema)
+        if backend != "fake" and LLM_MAX_RETRIES:
+            llm = llm.with_retry(retry_if_exception_type=_RETRYABLE_ERRORS, stop_after_attempt=LLM_MAX_RETRIES + 1)
+        # The metadata lets src/metrics.py tell which model, and whether a fallback, served each call
+        return llm.with_config(metadata={"llm_model": name, "llm_role": role})
+
+    def build():
+        if any(routing):
+            router = HedgedRouter(
+                [(model_name, structured(model_name, "primary"))]
+                + [(fallback, structured(fallback, "fallback")) for fallback in fallback_model_names],
+                *routing,
+            )
+            llm = RunnableLambda(router.invoke, afunc=router.ainvoke, name="routed_llm")
+        else:
+            llm = structured(model_name, "primary")
+            if fallback_model_names:
+                llm = llm.with_fallbacks([structured(fallback, "fallback") for fallback in fallback_model_names])
+        if cache is not None:
+            llm = _with_response_cache(llm, cache, backend, "|".join((model_name, *fallback_model_names)), schema)
+        return llm
+
+    return _get_or_create(
+        ("structured", backend, model_name, *fallback_model_names, schema, LLM_TEMPERATURE, LLM_MAX_RETRIES, cache, routing),
+        build,
+    )
+
+
+def invalidate_llm_clients(model_name: str | None = None):
+    """Drops cached clients (all of them, or only those using `model_name`) so they are rebuilt on next use."""
+    with _llm_registry_lock:
+        for key in list(_llm_registry):
+            if model_name is None or model_name in key:
+                del _llm_registry[key]
+
+
+# Prompt files are read once and re-read only when edited (see src/prompts.py)
+prompts = PromptRegistry(PROMPTS_DIR)
 
 
 def load_prompt(filename: str) -> str:
-    with open(PROMPTS_DIR / filename, "r") as f:
-        return f.read().strip()
+    return prompts.text(filename)
 
 # Pydantic Output Schemas
 class DraftResponse(BaseModel):
@@ -43,142 +219,701 @@ class JudgeResponse(BaseModel):
     escape_hatch_triggered: bool = Field(description="True ONLY if the debate reveals high uncertainty, unresolved ambiguity, or requires a manager's subjective judgment.")
     verdict: Literal["PASS", "FAIL", "AMBIGUOUS"] = Field(description="The final categorical verdict.")
 
+def _append_or_reset(left, right):
+    """Appends a node's new chunk to the history; returning None clears it (used when a new draft starts over)."""
+    if right is None:
+        return type(left)()
+    return left + right
+
+def _merge_unique(left: list[str], right: list[str] | None) -> list[str]:
+    """Merges new points into the list, dropping near-verbatim duplicates; None clears it (new draft)."""
+    if right is None:
+        return []
+    merged = list(left)
+    seen = {" ".join(point.lower().split()) for point in merged}
+    for point in right:
+        key = " ".join(point.lower().split())
+        if key not in seen:
+            seen.add(key)
+            merged.append(point)
+    return merged
+
+def _merge_budget(left: dict, right: dict | None) -> dict:
+    """Accumulates per-ticket budget usage; None starts a fresh budget.
+
+    Counters add up, started_at keeps the earliest time, elapsed_s the latest and limit_hit the first limit reached.
+    """
+    if right is None:
+        return {}
+    merged = dict(left)
+    for key, value in right.items():
+        if key == "started_at":
+            merged[key] = min(merged.get(key, value), value)
+        elif key == "elapsed_s":
+            merged[key] = max(merged.get(key, 0), value)
+        elif key == "limit_hit":
+            merged[key] = merged.get(key) or value
+        elif key == "node_seconds":
+            node_seconds = dict(merged.get(key, {}))
+            for node, seconds in value.items():
+                node_seconds[node] = node_seconds.get(node, 0) + seconds
+            merged[key] = node_seconds
+        else:
+            merged[key] = merged.get(key, 0) + value
+    return merged
+
+class DebateRound(TypedDict):
+    """One side of one debate round. Nodes append their own record; history is never rewritten."""
+    round: int
+    role: Literal["critique", "defense"]
+    persona: str | None  # attacker panel persona, None for a single attacker and for the defense
+    text: str
+    points: list[str]    # identified ambiguities (critique) or concessions (defense)
+
 class TicketState(TypedDict):
     query: str
     draft: str
     sources_cited: list[str]
-    critique: Annotated[str, operator.add]
-    identified_ambiguities: list[str]
-    defense: Annotated[str, operator.add]
-    concessions: list[str]
+    identified_ambiguities: Annotated[list[str], _merge_unique]
+    concessions: Annotated[list[str], _merge_unique]
+    # The debate transcript: append-only, so each node's checkpoint write carries only its own record
+    debate_rounds: Annotated[list[DebateRound], _append_or_reset]
     debate_synthesis: str
     escape_hatch_triggered: bool
     verdict: str  # "PASS", "FAIL", "AMBIGUOUS"
     turn_count: int
+    # drafts, input_tokens, output_tokens, started_at, elapsed_s, node_seconds and limit_hit for this ticket
+    budget: Annotated[dict, _merge_budget]
+    risk_score: float
+    risk_signals: list[str]
+    triage: str  # "fast" (draft + judge check) or "full" (attacker/defender debate)
+    # {"draft", "sources_cited", "tokens"}: revision generated while the judge deliberated, applied by
+    # the draft node only if the verdict loops back to a redraft; an escalated ticket keeps its judged draft
+    speculative_draft: dict | None
+    draft_hashes: Annotated[list[str], _merge_unique]  # every draft of this ticket, to catch a repeated draft
+
+
+# LLM calls shared by the sync and async node variants; `tags` mark calls that are not the node's own answer
+def _invoke(schema, messages, config: RunnableConfig, tags: list[str] | None = None):
+    return get_llm(schema, config).invoke(messages, {"tags": tags} if tags else None)
+
+async def _ainvoke(schema, messages, config: RunnableConfig, tags: list[str] | None = None):
+    return await get_llm(schema, config).ainvoke(messages, {"tags": tags} if tags else None)
+
+
+# Per-ticket budget. Every node records its wall-clock time and the tokens its LLM calls used;
+# the routers stop the debate (forced judge) or the redraft loop (human escalation) once a limit is hit.
+_node_usage = ContextVar("node_usage", default=None)
+register_configure_hook(_node_usage, inheritable=True)
+# Local metrics (src/metrics.py) see every LLM call of every run, whatever callbacks the caller passes
+_llm_metrics = ContextVar("llm_metrics", default=LLMMetricsHandler(metrics) if metrics.enabled else None)
+register_configure_hook(_llm_metrics, inheritable=True)
+
+def _over_budget(budget: dict, config: RunnableConfig) -> str | None:
+    """Name of the token or wall-clock limit this ticket has reached, if any."""
+    max_tokens = run_setting(config, "max_ticket_tokens")
+    max_seconds = run_setting(config, "max_ticket_seconds")
+    if max_tokens and budget.get("input_tokens", 0) + budget.get("output_tokens", 0) >= max_tokens:
+        return "tokens"
+    if max_seconds and time.time() - budget.get("started_at", time.time()) >= max_seconds:
+        return "seconds"
+    return None
+
+def _redrafts_exhausted(budget: dict, config: RunnableConfig) -> bool:
+    return budget.get("drafts", 0) - 1 >= run_setting(config, "max_redrafts")
+
+def _with_budget(
+    state: TicketState, update: dict, node_name: str, started_at: float, usage: UsageMetadataCallbackHandler, config: RunnableConfig
+):
+    finished_at = time.time()
+    delta = _merge_budget(update.get("budget", {}), {
+        "started_at": started_at,
+        "elapsed_s": finished_at - state.get("budget", {}).get("started_at", started_at),
+        "input_tokens": sum(u.get("input_tokens", 0) for u in usage.usage_metadata.values()),
+        "output_tokens": sum(u.get("output_tokens", 0) for u in usage.usage_metadata.values()),
+        # Input tokens the provider served from its prompt prefix cache (billed at a discount)
+        "cached_input_tokens": sum(
+            u.get("input_token_details", {}).get("cache_read", 0) for u in usage.usage_metadata.values()
+        ),
+        "node_seconds": {node_name: finished_at - started_at},
+    })
+    metrics.observe("debate_node_latency_seconds", finished_at - started_at, node=node_name)
+    limit = _over_budget(_merge_budget(state.get("budget", {}), delta), config)
+    if limit:
+        delta["limit_hit"] = limit
+    return {**update, "budget": delta}
+
+def _budgeted_node(node_name: str, func, afunc):
+    """Registers a node's sync and async variants, recording each call's time and token usage in `budget`."""
+    def run(state: TicketState, config: RunnableConfig):
+        usage, started_at = UsageMetadataCallbackHandler(), time.time()
+        token = _node_usage.set(usage)
+        try:
+            update = func(state, config)
+        except Exception:
+            metrics.inc("debate_node_errors_total", node=node_name)
+            raise
+        finally:
+            _node_usage.reset(token)
+        return _with_budget(state, update, node_name, started_at, usage, config)
+
+    async def arun(state: TicketState, config: RunnableConfig):
+        usage, started_at = UsageMetadataCallbackHandler(), time.time()
+        token = _node_usage.set(usage)
+        try:
+            update = await afunc(state, config)
+        except Exception:
+            metrics.inc("debate_node_errors_total", node=node_name)
+            raise
+        finally:
+            _node_usage.reset(token)
+        return _with_budget(state, update, node_name, started_at, usage, config)
+
+    return RunnableLambda(run, afunc=arun, name=node_name)
+
+
+# Risk triage. A keyword/rules scorer run at intake (no LLM call): tickets scoring below
+# TRIAGE_RISK_THRESHOLD take the fast path of a single draft plus a judge check; everything
+# else gets the full attacker/defender debate. A threshold of 0 sends every ticket to the debate.
+RISK_SIGNALS = {
+    "money": (r"refund|reimburs|compensat|chargeback|money back|store credit|discount", 0.35),
+    "legal": (r"lawyer|attorney|legal|lawsuit|\bsue\b|court|regulator|consumer protection", 0.5),
+    "safety": (r"injur|unsafe|hazard|allerg|burn|fire|broke.*(skin|tooth)", 0.5),
+    "high_value": (r"[$€£]\s?\d{3,}|\d{3,}\s?(usd|eur|gbp|dollars|euros)", 0.3),
+    "escalation": (r"manager|supervisor|unacceptable|complain|furious|disappointed|social media|review|cancel", 0.2),
+    "vip": (r"\bvip\b|loyal|long-time|years as a customer|luxury|premium", 0.15),
+}
+
+def score_risk(query: str) -> tuple[float, list[str]]:
+    """Risk score in [0, 1] and the names of the signals that fired."""
+    text = query.lower()
+    signals = [name for name, (pattern, _) in RISK_SIGNALS.items() if re.search(pattern, text)]
+    return round(min(1.0, sum(RISK_SIGNALS[name][1] for name in signals)), 3), signals
+
+
+# Attacker panel (ATTACKER_PANEL_SIZE > 1): personas critique the draft in parallel, their
+# ambiguities are merged and de-duplicated, and one defender call answers the merged critique.
+ATTACKER_PERSONAS = {
+    "policy": "Return, refund and warranty policy: flag anything promised that the policy does not support.",
+    "financial": "Financial exposure: refunds, credits, compensation and the precedent this resolution sets.",
+    "tone": "Tone and brand voice: how a high-value customer will read this reply, and anything that sounds dismissive.",
+}
+
+
+# Debate transcript handling. In "full" mode every prompt carries the whole debate history; in
+# "rolling" mode only the latest round is sent verbatim and older rounds are folded into a
+# summary of their structured points, capped at TRANSCRIPT_SUMMARY_TOKENS, so prompt size stays
+# roughly constant however many turns run.
+def _rolling_transcript(config: RunnableConfig) -> bool:
+    return run_setting(config, "transcript_mode") == "rolling"
+
+def _approx_tokens(text: str) -> int:
+    return len(text) // 4
+
+def _round(state: TicketState, role: str, round_number: int) -> tuple[str, list[str]]:
+    """Verbatim text and structured points of one side of one debate round."""
+    records = [
+        record for record in state.get("debate_rounds", [])
+        if record["role"] == role and record["round"] == round_number
+    ]
+    return "\n\n".join(record["text"] for record in records), [point for record in records for point in record["points"]]
+
+def _transcript(state: TicketState, role: str) -> str:
+    """Every round of one side of the debate, verbatim and in order, as sent in "full" mode."""
+    parts = []
+    for record in state.get("debate_rounds", []):
+        if record["role"] == role:
+            persona = f" ({record['persona']})" if record.get("persona") else ""
+            parts.append(f"--- Round {record['round']} {role.title()}{persona} ---\n{record['text']}\n\n")
+    return "".join(parts)
+
+def _debate_summary(state: TicketState, before_round: int, config: RunnableConfig) -> str:
+    """Structured summary of the rounds before `before_round`, newest first until the token budget runs out."""
+    budget = run_setting(config, "transcript_summary_tokens")
+    lines, used, omitted = [], 0, 0
+    for record in reversed(state.get("debate_rounds", [])):
+        if record["round"] >= before_round:
+            continue
+        label = "ambiguities raised" if record["role"] == "critique" else "concessions made"
+        line = f"- Round {record['round']} {label}: " + ("; ".join(record["points"]) or "none")
+        if used + _approx_tokens(line) > budget:
+            omitted += 1
+            continue
+        lines.append(line)
+        used += _approx_tokens(line)
+    lines.reverse()
+    if omitted:
+        lines.insert(0, f"- ({omitted} older entries omitted to stay within the transcript budget)")
+    return "\n".join(lines) or "None"
 
 
 # The Nodes (The Instacart LACE Debate)
-def draft_node(state: TicketState):
-    llm = get_llm(DraftResponse)
-    sys_msg = SystemMessage(content=load_prompt("draft_prompt.md"))
-    response = llm.invoke([sys_msg, HumanMessage(content=state.get("query", ""))])
-    return {
+# Each node is split into a message builder and a state update so that the sync (`invoke`)
+# and async (`ainvoke`) variants share everything except the LLM call itself.
+# Message layout keeps request prefixes stable for provider-side prompt caching: the system prompt
+# is always the registry's identical message, and per-ticket content goes into the human message
+# with the parts that change least (query, draft) first and per-call details (persona focus) last.
+def _failure_digest(state: TicketState, include_judge: bool = True) -> str:
+    """Structured digest of why the current draft is being replaced."""
+    lines = []
+    if include_judge and state.get("debate_synthesis"):
+        lines.append(f"- Judge's reasons for the FAIL verdict: {state['debate_synthesis']}")
+    lines.append(f"- Issues raised by the Auditor: {'; '.join(state.get('identified_ambiguities', [])) or 'none'}")
+    lines.append(f"- Weaknesses conceded in the Defense: {'; '.join(state.get('concessions', [])) or 'none'}")
+    return "\n".join(lines)
+
+def _draft_messages(state: TicketState, include_judge: bool = True):
+    sys_msg = prompts.system_message("draft_prompt.md")
+    if not state.get("budget", {}).get("drafts"):
+        return [sys_msg, HumanMessage(content=state.get("query", ""))]
+    # Redraft: without the failure reasons a temperature-0 model tends to reproduce the rejected draft
+    return [sys_msg, HumanMessage(content=(
+        f"{state.get('query', '')}\n\n"
+        f"Previous Draft (rejected, do not repeat it): {state.get('draft', '')}\n\n"
+        f"Failure Digest:\n{_failure_digest(state, include_judge)}\n\n"
+        "Write a revised draft that resolves every point in the digest."
+    ))]
+
+def _draft_hash(draft: str) -> str:
+    return hashlib.sha256(" ".join(draft.lower().split()).encode()).hexdigest()[:16]
+
+def _repeats_draft(state: TicketState, response: DraftResponse) -> bool:
+    return _draft_hash(response.draft) in state.get("draft_hashes", [])
+
+def _force_change_messages(messages, response: DraftResponse):
+    return [*messages[:-1], HumanMessage(content=(
+        f"{messages[-1].content}\n\n"
+        f"Your last attempt repeated a draft that was already rejected:\n{response.draft}\n"
+        "Change its substance to address the digest, not just its wording."
+    ))]
+
+def _draft_update(state: TicketState, response: DraftResponse):
+    update = {
         "draft": response.draft,
         "sources_cited": response.sources_cited,
-        "critique": "",             # Wipe constraints on new draft
-        "identified_ambiguities": [],
-        "defense": "",
-        "concessions": [],
-        "turn_count": 0             # Reset multi-turn counter
+        "identified_ambiguities": None,  # Wipe constraints on new draft
+        "concessions": None,
+        "debate_rounds": None,
+        "turn_count": 0,            # Reset multi-turn counter
+        "draft_hashes": [_draft_hash(response.draft)],
+        "budget": {"drafts": 1},
     }
+    if _repeats_draft(state, response):
+        # Even the forced change came back identical: debating it again would be wasted, hand it to a human
+        update["budget"]["limit_hit"] = "repeated_draft"
+        metrics.inc("debate_repeated_drafts_total", outcome="escalated")
+    return update
 
-def attacker_node(state: TicketState):
-    """Instacart Principle: The Skeptic"""
-    llm = get_llm(CritiqueResponse)
-    sys_msg = SystemMessage(content=load_prompt("attacker_prompt.md"))
+def _speculative_update(state: TicketState) -> dict | None:
+    """The redraft prepared by the judge's speculative call, if any, in place of a new draft call."""
+    speculative = state.get("speculative_draft")
+    if not speculative:
+        return None
+    update = _draft_update(state, DraftResponse(draft=speculative["draft"], sources_cited=speculative["sources_cited"]))
+    update["budget"]["speculative_hits"] = 1
+    return {**update, "speculative_draft": None}
+
+def draft_node(state: TicketState, config: RunnableConfig):
+    if (update := _speculative_update(state)) is not None:
+        return update
+    messages = _draft_messages(state)
+    response = _invoke(DraftResponse, messages, config)
+    if _repeats_draft(state, response):
+        metrics.inc("debate_repeated_drafts_total", outcome="forced_change")
+        response = _invoke(DraftResponse, _force_change_messages(messages, response), config)
+    return _draft_update(state, response)
+
+async def adraft_node(state: TicketState, config: RunnableConfig):
+    if (update := _speculative_update(state)) is not None:
+        return update
+    messages = _draft_messages(state)
+    response = await _ainvoke(DraftResponse, messages, config)
+    if _repeats_draft(state, response):
+        metrics.inc("debate_repeated_drafts_total", outcome="forced_change")
+        response = await _ainvoke(DraftResponse, _force_change_messages(messages, response), config)
+    return _draft_update(state, response)
+
+
+def _attacker_messages(state: TicketState, config: RunnableConfig):
+    sys_msg = prompts.system_message("attacker_prompt.md")
     
     # Allow Auditor to see previous rounds if multi-turn
     turn = state.get("turn_count", 0) + 1
-    recent_defense = state.get("defense", "")
+    recent_defense = _transcript(state, "defense")
     
     prompt_content = f"Draft to Attack: {state.get('draft', '')}"
-    if turn > 1 and recent_defense:
+    if turn > 1 and _rolling_transcript(config):
+        prompt_content += (
+            f"\n\nEarlier Rounds Summary:\n{_debate_summary(state, turn - 1, config)}"
+            f"\n\nPrevious round's Defense to rebut: {_round(state, 'defense', turn - 1)[0]}"
+        )
+    elif turn > 1 and recent_defense:
        prompt_content += f"\n\nPrevious round's Defense to rebut: {recent_defense}"
-        
-    response = llm.invoke([sys_msg, HumanMessage(content=prompt_content)])
-    
-    # Accumulate history by returning just the new chunk (LangGraph operator.add handles the appending)
-    new_critique_text = f"--- Round {turn} Critique ---\n{response.critique}\n\n"
-    historical_ambiguities = state.get("identified_ambiguities", []) + response.identified_ambiguities
-    
+    if state.get("persona"):
+        prompt_content += f"\n\nYour focus on this panel: {ATTACKER_PERSONAS[state['persona']]}"
+    return [sys_msg, HumanMessage(content=prompt_content)]
+
+def _attacker_update(state: TicketState, response: CritiqueResponse):
+    turn = state.get("turn_count", 0) + 1
+    persona = state.get("persona")
+    # Accumulate history by returning just the new record (the reducers handle appending and merging panel results)
     return {
-        "critique": new_critique_text,
-        "identified_ambiguities": historical_ambiguities
+        "identified_ambiguities": response.identified_ambiguities,
+        "debate_rounds": [{
+            "round": turn, "role": "critique", "persona": persona,
+            "text": response.critique, "points": response.identified_ambiguities,
+        }],
     }
 
-def defender_node(state: TicketState):
-    """Instacart Principle: The Supporter"""
-    llm = get_llm(DefenseResponse)
-    sys_msg = SystemMessage(content=load_prompt("defender_prompt.md"))
-    turn = state.get("turn_count", 0) + 1
-    
+def attacker_node(state: TicketState, config: RunnableConfig):
+    """Instacart Principle: The Skeptic"""
+    return _attacker_update(state, _invoke(CritiqueResponse, _attacker_messages(state, config), config))
+
+async def aattacker_node(state: TicketState, config: RunnableConfig):
+    """Instacart Principle: The Skeptic"""
+    return _attacker_update(state, await _ainvoke(CritiqueResponse, _attacker_messages(state, config), config))
+
+
+def _defender_messages(state: TicketState, config: RunnableConfig):
+    sys_msg = prompts.system_message("defender_prompt.md")
+    if _rolling_transcript(config):
+        turn = state.get("turn_count", 0) + 1
+        return [sys_msg, HumanMessage(content=(
+            f"Draft: {state.get('draft', '')}\n"
+            f"Earlier Rounds Summary:\n{_debate_summary(state, turn, config)}\n"
+            f"Latest Critique: {_round(state, 'critique', turn)[0]}"
+        ))]
     # We only feed the FULL accumulated critique history so the defender knows what to answer
-    response = llm.invoke([sys_msg, HumanMessage(content=f"Draft: {state.get('draft', '')}\nCritique History: {state.get('critique', '')}")])
-    
-    # Accumulate history by returning just the new chunk (LangGraph operator.add handles the appending)
-    new_defense_text = f"--- Round {turn} Defense ---\n{response.defense}\n\n"
-    historical_concessions = state.get("concessions", []) + response.concessions
-    
+    return [sys_msg, HumanMessage(content=f"Draft: {state.get('draft', '')}\nCritique History: {_transcript(state, 'critique')}")]
+
+def _defender_update(state: TicketState, response: DefenseResponse):
+    turn = state.get("turn_count", 0) + 1
+    # Accumulate history by returning just the new record (the _append_or_reset reducer handles the appending)
     return {
-        "defense": new_defense_text,
-        "concessions": historical_concessions,
+        "concessions": response.concessions,
+        "debate_rounds": [{
+            "round": turn, "role": "defense", "persona": None, "text": response.defense, "points": response.concessions,
+        }],
         "turn_count": turn
     }
 
-def judge_node(state: TicketState):
-    """The Final Arbiter + Ramp Uncertainty Principle"""
-    llm = get_llm(JudgeResponse)
-    sys_msg = SystemMessage(content=load_prompt("judge_prompt.md"))
+def defender_node(state: TicketState, config: RunnableConfig):
+    """Instacart Principle: The Supporter"""
+    return _defender_update(state, _invoke(DefenseResponse, _defender_messages(state, config), config))
+
+async def adefender_node(state: TicketState, config: RunnableConfig):
+    """Instacart Principle: The Supporter"""
+    return _defender_update(state, await _ainvoke(DefenseResponse, _defender_messages(state, config), config))
+
+
+def _judge_messages(state: TicketState, config: RunnableConfig):
+    sys_msg = prompts.system_message("judge_prompt.md")
+    if state.get("triage") == "fast":
+        debate_text = (
+            "Fast-path review: triage scored this ticket as low risk, so no Auditor debate was run. "
+            "Judge the draft directly against the customer query.\n\n"
+            f"Customer Query: {state.get('query', '')}\n\n"
+            f"Draft: {state.get('draft', '')}\n"
+            f"Sources Cited: {state.get('sources_cited', [])}"
+        )
+        return [sys_msg, HumanMessage(content=debate_text)]
+    if _rolling_transcript(config):
+        turn = state.get("turn_count", 0)
+        critique, ambiguities = _round(state, "critique", turn)
+        defense, concessions = _round(state, "defense", turn)
+        debate_text = (
+            f"Draft: {state.get('draft', '')}\n"
+            f"Sources Cited: {state.get('sources_cited', [])}\n\n"
+            f"Earlier Rounds Summary:\n{_debate_summary(state, turn, config)}\n\n"
+            f"Final Round Critique: {critique}\n"
+            f"Final Round Ambiguities: {ambiguities}\n\n"
+            f"Final Round Defense: {defense}\n"
+            f"Final Round Concessions: {concessions}"
+        )
+        return [sys_msg, HumanMessage(content=debate_text)]
     debate_text = (
         f"Draft: {state.get('draft', '')}\n"
         f"Sources Cited: {state.get('sources_cited', [])}\n\n"
-        f"Critique: {state.get('critique', '')}\n"
+        f"Critique: {_transcript(state, 'critique')}\n"
         f"Identified Ambiguities: {state.get('identified_ambiguities', [])}\n\n"
-        f"Defense: {state.get('defense', '')}\n"
+        f"Defense: {_transcript(state, 'defense')}\n"
         f"Concessions: {state.get('concessions', [])}"
     )
-    response = llm.invoke([sys_msg, HumanMessage(content=debate_text)])
-    return {
+    return [sys_msg, HumanMessage(content=debate_text)]
+
+def _judge_update(state: TicketState, response: JudgeResponse, config: RunnableConfig):
+    update = {
         "debate_synthesis": response.debate_synthesis,
         "escape_hatch_triggered": response.escape_hatch_triggered,
-        "verdict": response.verdict
+        "verdict": response.verdict,
+        "speculative_draft": None,
+    }
+    if response.verdict == "FAIL" and _redrafts_exhausted(state.get("budget", {}), config):
+        update["budget"] = {"limit_hit": "redrafts"}
+    if response.verdict == "FAIL" and state.get("triage") == "fast":
+        update["triage"] = "full"  # The fast path failed its check: the redraft goes through the full debate
+    return update
+
+def judge_node(state: TicketState, config: RunnableConfig):
+    """The Final Arbiter + Ramp Uncertainty Principle"""
+    if _should_speculate(state, config):
+        return _speculative_judge(state, config)
+    return _judge_update(state, _invoke(JudgeResponse, _judge_messages(state, config), config), config)
+
+async def ajudge_node(state: TicketState, config: RunnableConfig):
+    """The Final Arbiter + Ramp Uncertainty Principle"""
+    if _should_speculate(state, config):
+        return await _aspeculative_judge(state, config)
+    return _judge_update(state, await _ainvoke(JudgeResponse, _judge_messages(state, config), config), config)
+
+
+# Speculative redraft (SPECULATIVE_REDRAFT). While the judge deliberates, a revision of the draft
+# is generated in parallel from the ambiguities and concessions of the debate. On FAIL it is kept
+# in `speculative_draft`, and if `route_verdict` loops back to a redraft the draft node applies it
+# instead of calling the model (saving a serial LLM round-trip). If the ticket escalates instead
+# (e.g. the judge call itself used up the budget), the judged draft and its debate stay in state
+# and the revision is discarded. On PASS or AMBIGUOUS it is cancelled (async) or left to finish in
+# the background (sync) and its tokens count as wasted. Both calls run inside the judge node, so a
+# PASS never waits for the revision; the revision's call is tagged SPECULATIVE_TAG so streaming
+# does not show it as the judge's output.
+SPECULATIVE_TAG = "speculative_redraft"
+
+def _should_speculate(state: TicketState, config: RunnableConfig) -> bool:
+    budget = state.get("budget", {})
+    return (
+        run_setting(config, "speculative_redraft")
+        and state.get("turn_count", 0) > 0  # There is debate feedback to revise against
+        and not _redrafts_exhausted(budget, config)
+        and not _over_budget(budget, config)
+    )
+
+def _speculation_update(
+    state: TicketState, update: dict, revision: DraftResponse | None, usage: UsageMetadataCallbackHandler, messages
+) -> dict:
+    """Keeps the revision for the draft node when the verdict calls for a redraft, and records the outcome in `budget`."""
+    input_tokens = sum(u.get("input_tokens", 0) for u in usage.usage_metadata.values())
+    output_tokens = sum(u.get("output_tokens", 0) for u in usage.usage_metadata.values())
+    stats = {"input_tokens": input_tokens, "output_tokens": output_tokens, "speculative_drafts": 1}
+    if revision is not None:
+        # Counted as a hit by the draft node once applied, or as wasted if the ticket escalates instead
+        update = {**update, "speculative_draft": {
+            "draft": revision.draft, "sources_cited": revision.sources_cited, "tokens": input_tokens + output_tokens,
+        }}
+    else:
+        # A cancelled call reports no usage, but the provider has already received the prompt
+        stats["speculative_wasted_tokens"] = (
+            input_tokens + output_tokens or sum(_approx_tokens(str(message.content)) for message in messages)
+        )
+    return {**update, "budget": _merge_budget(update.get("budget", {}), stats)}
+
+def _adopts_revision(update: dict) -> bool:
+    return update["verdict"] == "FAIL" and "limit_hit" not in update.get("budget", {})
+
+def _usable_revision(state: TicketState, revision: DraftResponse) -> DraftResponse | None:
+    # A revision that repeats a rejected draft is dropped; the draft node then redrafts with the full digest
+    return None if _repeats_draft(state, revision) else revision
+
+def _speculative_judge(state: TicketState, config: RunnableConfig):
+    # The judge is still deciding, so the digest has the debate's points but not its synthesis
+    messages, usage = _draft_messages(state, include_judge=False), UsageMetadataCallbackHandler()
+
+    def speculate():
+        _node_usage.set(usage)  # Runs in a copied context, so the revision's tokens are tracked on their own
+        return _invoke(DraftResponse, messages, config, tags=[SPECULATIVE_TAG])
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    speculation = executor.submit(contextvars.copy_context().run, speculate)
+    executor.shutdown(wait=False)
+    update = _judge_update(state, _invoke(JudgeResponse, _judge_messages(state, config), config), config)
+    revision = None
+    if _adopts_revision(update):
+        try:
+            revision = _usable_revision(state, speculation.result())
+        except Exception:
+            pass  # The regular draft node redrafts instead
+    return _speculation_update(state, update, revision, usage, messages)
+
+async def _aspeculative_judge(state: TicketState, config: RunnableConfig):
+    messages, usage = _draft_messages(state, include_judge=False), UsageMetadataCallbackHandler()
+
+    async def speculate():
+        _node_usage.set(usage)  # Tasks run in a copied context, so the revision's tokens are tracked on their own
+        return await _ainvoke(DraftResponse, messages, config, tags=[SPECULATIVE_TAG])
+
+    speculation = asyncio.create_task(speculate())
+    try:
+        update = _judge_update(state, await _ainvoke(JudgeResponse, _judge_messages(state, config), config), config)
+    except BaseException:
+        speculation.cancel()
+        raise
+    revision = None
+    if _adopts_revision(update):
+        try:
+            revision = _usable_revision(state, await speculation)
+        except Exception:
+            pass  # The regular draft node redrafts instead
+    else:
+        speculation.cancel()
+    return _speculation_update(state, update, revision, usage, messages)
+
+def speculation_stats(budgets) -> dict:
+    """Hit rate and wasted tokens of speculative redrafts across tickets' `budget` dicts."""
+    drafts = hits = wasted = 0
+    for budget in budgets:
+        drafts += budget.get("speculative_drafts", 0)
+        hits += budget.get("speculative_hits", 0)
+        wasted += budget.get("speculative_wasted_tokens", 0)
+    return {
+        "speculative_drafts": drafts,
+        "speculative_hits": hits,
+        "hit_rate": round(hits / drafts, 3) if drafts else None,
+        "wasted_tokens": wasted,
+    }
+
+def convergence_stats(states) -> dict:
+    """Average debate cycles (drafts judged) per ticket that ended in PASS, across final ticket states."""
+    cycles = [state.get("budget", {}).get("drafts", 0) for state in states if state.get("verdict") == "PASS"]
+    return {"passed": len(cycles), "avg_cycles_per_pass": round(sum(cycles) / len(cycles), 3) if cycles else None}
+
+def intake_node(state: TicketState, config: RunnableConfig):
+    """Scores ticket risk and starts a fresh budget (a reused thread_id must not inherit the previous ticket's usage)"""
+    risk_score, risk_signals = score_risk(state.get("query", ""))
+    threshold = run_setting(config, "triage_risk_threshold")
+    return {
+        "budget": None,
+        "draft_hashes": None,
+        "speculative_draft": None,
+        "risk_score": risk_score,
+        "risk_signals": risk_signals,
+        "triage": "fast" if risk_score < threshold else "full",
     }
 
 def human_escalation_node(state: TicketState):
     """Ramp Principle: Safe Escape Hatch"""
-    return {"draft": "[SYSTEM: Escalated to Human Manager due to ambiguity.]"}
+    limit_hit = state.get("budget", {}).get("limit_hit")
+    if limit_hit == "repeated_draft":
+        draft = "[SYSTEM: Escalated to Human Manager after redrafting kept reproducing a rejected draft.]"
+    elif state.get("verdict") == "FAIL" and limit_hit:
+        draft = f"[SYSTEM: Escalated to Human Manager after exhausting the ticket budget ({limit_hit}).]"
+    else:
+        draft = "[SYSTEM: Escalated to Human Manager due to ambiguity.]"
+    if speculative := state.get("speculative_draft"):
+        # The revision was never applied: the ticket escalated instead of looping back to a redraft
+        return {"draft": draft, "speculative_draft": None, "budget": {"speculative_wasted_tokens": speculative["tokens"]}}
+    return {"draft": draft}
 
 # Routing Logic
-def route_verdict(state: TicketState):
+def route_verdict(state: TicketState, config: RunnableConfig):
     if state.get("verdict") == "PASS":
         return END
     elif state.get("verdict") == "FAIL":
-        return "draft" # Loop back and try again
+        budget = state.get("budget", {})
+        if _redrafts_exhausted(budget, config) or _over_budget(budget, config):
+            return "human_escalation" # Budget spent: stop looping and hand over to a manager
+        return "draft" # Loop back and try again (applying the speculative redraft, if there is one)
     else:  # AMBIGUOUS
         return "human_escalation"
 
-def route_debate(state: TicketState):
-    """Multi-turn loop router"""
-    max_debate_turns = int(os.environ.get("MAX_DEBATE_TURNS", 1))
-    if state.get("turn_count", 0) < max_debate_turns:
+def route_draft(state: TicketState, config: RunnableConfig):
+    """Triage router: low-risk tickets skip the debate and go straight to a judge check"""
+    if state.get("budget", {}).get("limit_hit") == "repeated_draft":
+        return "human_escalation"
+    if state.get("triage") == "fast" or _over_budget(state.get("budget", {}), config):
+        return "judge"  # Low risk, or the budget is already spent: no debate, straight to a (forced) judge
+    return route_attack(state, config)
+
+def route_attack(state: TicketState, config: RunnableConfig):
+    """Fan-out router: a single attacker, or a panel of attacker personas running in parallel"""
+    panel_size = run_setting(config, "attacker_panel_size")
+    if panel_size <= 1:
         return "attacker"
+    from langgraph.types import Send
+    return [Send("attacker", {**state, "persona": persona}) for persona in list(ATTACKER_PERSONAS)[:panel_size]]
+
+def route_debate(state: TicketState, config: RunnableConfig):
+    """Multi-turn loop router"""
+    max_debate_turns = run_setting(config, "max_debate_turns")
+    if state.get("turn_count", 0) < max_debate_turns and not _over_budget(state.get("budget", {}), config):
+        return route_attack(state, config)
     return "judge"
 
 # Build the Graph
-builder = StateGraph(TicketState)
-builder.add_node("draft", draft_node)
-builder.add_node("attacker", attacker_node)
-builder.add_node("defender", defender_node)
-builder.add_node("judge", judge_node)
-builder.add_node("human_escalation", human_escalation_node)
-
-# Flow
-builder.set_entry_point("draft")
-builder.add_edge("draft", "attacker")
-builder.add_edge("attacker", "defender")
-builder.add_conditional_edges(
-    "defender",
-    route_debate,
-    {"attacker": "attacker", "judge": "judge"}
-)
-builder.add_conditional_edges(
-    "judge", 
-    route_verdict, 
-    {END: END, "draft": "draft", "human_escalation": "human_escalation"}
-)
-builder.add_edge("human_escalation", END)
-
-# Compile with Checkpointer for Human-in-the-Loop
-memory = InMemorySaver()
-# interrupt_before pauses the graph right before the human escalation node
-graph = builder.compile(checkpointer=memory, interrupt_before=["human_escalation"])
+def build_graph():
+    """Returns a new, uncompiled StateGraph of the debate; compile it with any checkpointer."""
+    from langgraph.graph import StateGraph
+
+    builder = StateGraph(TicketState)
+    builder.add_node("intake", intake_node)
+    # Each node carries both variants: `graph.stream`/`invoke` run the sync one, `astream`/`ainvoke` the async one
+    builder.add_node("draft", _budgeted_node("draft", draft_node, adraft_node))
+    builder.add_node("attacker", _budgeted_node("attacker", attacker_node, aattacker_node))
+    builder.add_node("defender", _budgeted_node("defender", defender_node, adefender_node))
+    builder.add_node("judge", _budgeted_node("judge", judge_node, ajudge_node))
+    builder.add_node("human_escalation", human_escalation_node)
+
+    # Flow
+    builder.set_entry_point("intake")
+    builder.add_edge("intake", "draft")
+    builder.add_conditional_edges("draft", route_draft, ["attacker", "judge", "human_escalation"])
+    # With a panel, the defender waits for every attacker and answers the merged critique once
+    builder.add_edge("attacker", "defender")
+    builder.add_conditional_edges(
+        "defender",
+        route_debate,
+        ["attacker", "judge"]
+    )
+    builder.add_conditional_edges(
+        "judge",
+        route_verdict,
+        [END, "draft", "human_escalation"]
+    )
+    builder.add_edge("human_escalation", END)
+    return builder
+
+
+# The compiled graph and its checkpoint store are built on first use and shared by the process
+_graph = None
+_checkpointer = None
+_graph_lock = threading.RLock()
+
+
+def get_checkpointer():
+    """The process-wide checkpoint store, opened on first call."""
+    global _checkpointer
+    if _checkpointer is None:
+        with _graph_lock:
+            if _checkpointer is None:
+                from src.checkpoint import SqliteCheckpointSaver
+                # Checkpoints live in a bounded SQLite store (CHECKPOINT_DB) so paused escalations survive restarts,
+                # and threads paused before human escalation are indexed for the review queue (src/escalations.py)
+                _checkpointer = SqliteCheckpointSaver.from_env(
+                    str(Path(__file__).parent.parent / "checkpoints.sqlite"), escalation_node="human_escalation"
+                )
+    return _checkpointer
+
+
+def get_graph():
+    """The process-wide compiled graph, built and compiled on first call and cached."""
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                # interrupt_before pauses the graph right before the human escalation node
+                _graph = build_graph().compile(checkpointer=get_checkpointer(), interrupt_before=["human_escalation"])
+    return _graph
+
+
+def __getattr__(name: str):
+    # `graph`, `memory` and `builder` stay importable as module attributes, built on first access
+    if name == "graph":
+        return get_graph()
+    if name == "memory":
+        return get_checkpointer()
+    if name == "builder":
+        return build_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def compact_checkpoints(ttl_seconds: float) -> dict:
+    """Removes threads idle for `ttl_seconds`, except those still paused before human escalation."""
+    return get_checkpointer().compact(ttl_seconds)
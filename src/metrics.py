@@ -0,0 +1,182 @@
+"""Process-local metrics for the debate graph, with no external service.
+
+Node latency histograms, LLM token counters, structured-output parse failures, fallback usage,
+failed attempts and retries, and checkpoint (state) sizes are recorded in `metrics`. They can be
+read as Prometheus text exposition (`metrics.prometheus_text()`) or written to a file, either on
+demand with `metrics.dump(path)` or at process exit when METRICS_FILE is set. METRICS_ENABLED=false
+turns recording off.
+"""
+import atexit
+import bisect
+import os
+import threading
+from collections import defaultdict
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.exceptions import OutputParserException
+from pydantic import ValidationError
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (1_024, 4_096, 16_384, 65_536, 262_144, 1_048_576, 4_194_304)
+
+# name -> (type, help, histogram buckets)
+METRIC_DEFINITIONS = {
+    "debate_node_latency_seconds": ("histogram", "Wall-clock time of each graph node call.", LATENCY_BUCKETS),
+    "debate_node_errors_total": ("counter", "Graph node calls that raised.", None),
+    "debate_llm_calls_total": ("counter", "Completed LLM calls by model and role (primary or fallback).", None),
+    "debate_llm_tokens_total": ("counter", "LLM tokens by node, model and kind (input, output, cached_input).", None),
+    "debate_llm_errors_total": ("counter", "Failed LLM attempts by model and error type; each is retried or falls back.", None),
+    "debate_llm_retries_total": ("counter", "LLM attempts made by a LangChain retry wrapper after a failure.", None),
+    "debate_llm_routes_total": ("counter", "Routed LLM calls by the model tried first and why (primary, adaptive).", None),
+    "debate_llm_hedges_total": ("counter", "Hedged LLM calls by which attempt answered first (first_won, hedge_won).", None),
+    "debate_llm_timeouts_total": ("counter", "LLM attempts abandoned after the per-call timeout, by model.", None),
+    "debate_parse_failures_total": ("counter", "Structured outputs that failed to parse or validate, by node.", None),
+    "debate_repeated_drafts_total": ("counter", "Redrafts identical to a rejected draft, by outcome (forced_change, escalated).", None),
+    "debate_escalations_resolved_total": ("counter", "Paused human escalations handled from the review queue, by action (approve, reject, resume).", None),
+    "debate_checkpoint_bytes": ("histogram", "Stored size of each checkpointed graph state (after compression).", BYTES_BUCKETS),
+}
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Metrics:
+    """Thread-safe counters and histograms keyed by metric name and label set."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)   # (name, labels) -> value
+        self._histograms = {}                 # (name, labels) -> [count per bucket..., +Inf count, sum]
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[(name, _label_key(labels))] += value
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        buckets = METRIC_DEFINITIONS[name][2]
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(buckets) + 2)
+            histogram[bisect.bisect_left(buckets, value)] += 1
+            histogram[-1] += value
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def value(self, name: str, **labels) -> float:
+        """Sum of a counter over every label set matching `labels`."""
+        with self._lock:
+            return sum(
+                value for (metric, key), value in self._counters.items()
+                if metric == name and set(labels.items()) <= set(key)
+            )
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(values) for key, values in self._histograms.items()}
+        lines = []
+        for name, (kind, help_text, buckets) in METRIC_DEFINITIONS.items():
+            series = counters if kind == "counter" else histograms
+            keys = sorted(key for key in series if key[0] == name)
+            if not keys:
+                continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for key in keys:
+                labels = key[1]
+                if kind == "counter":
+                    lines.append(f"{name}{_format_labels(labels)} {series[key]:g}")
+                    continue
+                counts, total = series[key][:-1], series[key][-1]
+                cumulative = 0
+                for bound, count in zip((*buckets, "+Inf"), counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {total:g}")
+                lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """Records per-call LLM metrics. Attached to every run through a configure hook in src/graph.py."""
+
+    run_inline = True
+
+    def __init__(self, registry: Metrics):
+        self.registry = registry
+        self._runs = {}    # LLM run_id -> (model, role, node)
+        self._chains = {}  # chain run_id -> node, for attributing parse failures
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, tags=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        model = metadata.get("llm_model") or metadata.get("ls_model_name") or "unknown"
+        self._runs[run_id] = (model, metadata.get("llm_role", "primary"), metadata.get("langgraph_node", "none"))
+        self._count_retry(tags, model)
+
+    def _count_retry(self, tags, model: str):
+        # The retry wrapper tags only its direct child: the chat model, or the structured-output chain around it
+        if any(tag.startswith("retry:attempt:") for tag in tags or []):
+            self.registry.inc("debate_llm_retries_total", model=model)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        model, role, node = self._runs.pop(run_id, ("unknown", "primary", "none"))
+        self.registry.inc("debate_llm_calls_total", model=model, role=role)
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                for kind, tokens in (
+                    ("input", usage.get("input_tokens", 0)),
+                    ("output", usage.get("output_tokens", 0)),
+                    ("cached_input", usage.get("input_token_details", {}).get("cache_read", 0)),
+                ):
+                    if tokens:
+                        self.registry.inc("debate_llm_tokens_total", tokens, node=node, model=model, kind=kind)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        model, _, _ = self._runs.pop(run_id, ("unknown", "primary", "none"))
+        self.registry.inc("debate_llm_errors_total", model=model, error=type(error).__name__)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, tags=None, metadata=None, **kwargs):
+        self._count_retry(tags, (metadata or {}).get("llm_model", "unknown"))
+        if metadata and "langgraph_node" in metadata:
+            self._chains[run_id] = metadata["langgraph_node"]
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._chains.pop(run_id, None)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        node = self._chains.pop(run_id, "none")
+        # The same exception surfaces in every enclosing chain; count it once, where it was raised
+        if isinstance(error, (OutputParserException, ValidationError)) and not getattr(error, "_metrics_counted", False):
+            error._metrics_counted = True
+            self.registry.inc("debate_parse_failures_total", node=node)
+
+
+metrics = Metrics(enabled=os.environ.get("METRICS_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off"))
+
+if os.environ.get("METRICS_FILE"):
+    atexit.register(metrics.dump, os.environ["METRICS_FILE"])
@@ -0,0 +1,54 @@
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+from langchain_core.messages import SystemMessage
+
+
+class PromptAsset(NamedTuple):
+    text: str
+    sha256: str
+    mtime_ns: int
+    system_message: SystemMessage
+
+
+class PromptRegistry:
+    """In-process cache of the prompt files, reloaded only when a file's mtime changes.
+
+    Every call for the same prompt version gets the same SystemMessage object, so the system
+    prefix of each request is byte-identical across calls and provider-side prefix caching
+    (Gemini implicit caching) can reuse it. A `stat` per lookup is all that touches the disk.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.loads = 0
+        self._assets = {}
+        self._lock = threading.Lock()
+
+    def get(self, filename: str) -> PromptAsset:
+        path = self.directory / filename
+        mtime_ns = os.stat(path).st_mtime_ns
+        asset = self._assets.get(filename)
+        if asset is None or asset.mtime_ns != mtime_ns:
+            with self._lock:
+                asset = self._assets.get(filename)
+                if asset is None or asset.mtime_ns != mtime_ns:
+                    text = path.read_text().strip()
+                    asset = self._assets[filename] = PromptAsset(
+                        text, hashlib.sha256(text.encode()).hexdigest(), mtime_ns, SystemMessage(content=text)
+                    )
+                    self.loads += 1
+        return asset
+
+    def text(self, filename: str) -> str:
+        return self.get(filename).text
+
+    def system_message(self, filename: str) -> SystemMessage:
+        return self.get(filename).system_message
+
+    def versions(self) -> dict[str, str]:
+        """Short content hash of every prompt loaded so far, for logging which prompt versions served a run."""
+        return {filename: asset.sha256[:12] for filename, asset in self._assets.items()}
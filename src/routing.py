@@ -0,0 +1,359 @@
+"""Latency-aware model routing with hedged requests, used by `get_llm` in src/graph.py.
+
+`model_stats` keeps, per model, a window of recent call latencies and an exponentially weighted
+error rate. Attempts abandoned before they answered (the loser of a hedge, a timeout) add their
+elapsed time as a lower bound, so the window is not left with only the calls fast enough to win.
+For every call, `HedgedRouter`:
+
+1. picks the model to try first: the configured primary, unless adaptive routing is on and
+   another candidate's expected time to a good answer (median latency / success rate) is
+   ROUTING_SWITCH_RATIO times better;
+2. hedges: once that model has taken longer than its own `hedge_percentile` latency, the next
+   candidate is fired too, and the first valid answer wins (the other attempt is cancelled);
+3. bounds every attempt by `call_timeout_s`, and on an error or timeout moves on to the next
+   candidate, like `with_fallbacks`.
+
+Every call's decision (order, hedge delay, whether it hedged, winner, failures) is appended to
+`routing_log`; `routing_report()` summarizes the log and the per-model stats, which is what the
+hedge percentile is tuned against.
+"""
+import asyncio
+import bisect
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+from src.metrics import metrics
+
+LATENCY_WINDOW = 200
+ERROR_RATE_DECAY = 0.1
+# Below this many latency samples a model's percentile is not trusted: no hedging, no switching
+MIN_SAMPLES = 20
+ROUTING_SWITCH_RATIO = float(os.environ.get("ROUTING_SWITCH_RATIO", 1.5))
+ROUTING_LOG_SIZE = 1_000
+
+
+class ModelStats:
+    """Recent latency window and decayed error rate of one model."""
+
+    def __init__(self):
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._sorted = []
+        self.error_rate = 0.0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency_s: float | None, ok: bool):
+        with self._lock:
+            self.calls += 1
+            self.error_rate += ERROR_RATE_DECAY * ((0.0 if ok else 1.0) - self.error_rate)
+            if ok and latency_s is not None:
+                self._add(latency_s)
+
+    def record_lower_bound(self, latency_s: float):
+        """Adds the elapsed time of an attempt abandoned before it answered; it would have taken at least this long."""
+        with self._lock:
+            self._add(latency_s)
+
+    def _add(self, latency_s: float):
+        if len(self._latencies) == self._latencies.maxlen:
+            self._sorted.pop(bisect.bisect_left(self._sorted, self._latencies[0]))
+        self._latencies.append(latency_s)
+        bisect.insort(self._sorted, latency_s)
+
+    @property
+    def samples(self) -> int:
+        return len(self._sorted)
+
+    def percentile(self, q: float) -> float | None:
+        with self._lock:
+            if len(self._sorted) < MIN_SAMPLES:
+                return None
+            return self._sorted[min(len(self._sorted) - 1, int(q / 100 * len(self._sorted)))]
+
+    def expected_seconds(self) -> float | None:
+        """Median latency scaled by the expected number of attempts to get a success."""
+        median = self.percentile(50)
+        if median is None:
+            return None
+        return median / max(1.0 - self.error_rate, 0.05)
+
+    def summary(self) -> dict:
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "calls": self.calls,
+            "samples": self.samples,
+            "p50_s": None if p50 is None else round(p50, 4),
+            "p95_s": None if p95 is None else round(p95, 4),
+            "error_rate": round(self.error_rate, 4),
+        }
+
+
+class _StatsRegistry:
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, model: str) -> ModelStats:
+        stats = self._stats.get(model)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.setdefault(model, ModelStats())
+        return stats
+
+    def items(self):
+        return list(self._stats.items())
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+model_stats = _StatsRegistry()
+routing_log = deque(maxlen=ROUTING_LOG_SIZE)
+# How often a sync call checks on an attempt whose thread has not started running yet
+_START_POLL_SECONDS = 0.01
+
+
+def _start_attempt(runnable, messages, attempt_starts: dict) -> Future:
+    """Runs one sync attempt on a thread of its own and records when it actually starts running.
+
+    Not a shared pool: an attempt that stalls past its timeout keeps only its own thread busy, so
+    it can never hold up the fallback or hedge that replaces it.
+    """
+    future = Future()
+    # Copied context: the attempt reports to the node's usage and metrics handlers
+    context = contextvars.copy_context()
+
+    def run():
+        attempt_starts[future] = time.perf_counter()
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(context.run(runnable.invoke, messages))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="llm-attempt", daemon=True).start()
+    return future
+
+
+class HedgedRouter:
+    """Routes one structured-output call across `candidates` ([(model name, runnable), ...], primary first)."""
+
+    def __init__(self, candidates: list, hedge_percentile: float = 0, call_timeout_s: float = 0, adaptive: bool = False):
+        self.candidates = candidates
+        self.hedge_percentile = hedge_percentile
+        self.call_timeout_s = call_timeout_s
+        self.adaptive = adaptive
+
+    def _plan(self) -> tuple[list, dict]:
+        order, reason = list(self.candidates), "primary"
+        if self.adaptive:
+            best = 0
+            for i, (name, _) in enumerate(order):
+                expected, best_expected = model_stats[name].expected_seconds(), model_stats[order[best][0]].expected_seconds()
+                if expected is not None and (best_expected is None or expected * ROUTING_SWITCH_RATIO < best_expected):
+                    best = i
+            if best:
+                order.insert(0, order.pop(best))
+                reason = "adaptive"
+        hedge_delay_s = None
+        if self.hedge_percentile and len(order) > 1:
+            hedge_delay_s = model_stats[order[0][0]].percentile(self.hedge_percentile)
+        decision = {
+            "at": time.time(), "order": [name for name, _ in order], "reason": reason,
+            "hedge_delay_s": hedge_delay_s, "hedged": False, "winner": None, "latency_s": None, "failures": [],
+        }
+        metrics.inc("debate_llm_routes_total", model=order[0][0], reason=reason)
+        return order, decision
+
+    def _next_wait(self, decision: dict, started: float, queue: list, pending: dict, attempt_starts: dict) -> float | None:
+        """Seconds until the next hedge or attempt deadline, whichever comes first."""
+        now = time.perf_counter()
+        deadlines = []
+        if self._may_hedge(decision, queue, pending) and decision["hedge_delay_s"] is not None:
+            deadlines.append(started + decision["hedge_delay_s"])
+        if self.call_timeout_s:
+            for attempt in pending:
+                # An attempt's timeout runs from when it starts running, not from when it was launched
+                attempt_started = attempt_starts.get(attempt)
+                deadlines.append(now + _START_POLL_SECONDS if attempt_started is None else attempt_started + self.call_timeout_s)
+        return max(0.0, min(deadlines) - now) if deadlines else None
+
+    @staticmethod
+    def _may_hedge(decision: dict, queue: list, pending: dict) -> bool:
+        # One hedge per call, and only alongside a first attempt that is still running
+        return bool(queue) and not decision["hedged"] and not decision["failures"] and len(pending) == 1
+
+    def _hedge_due(self, decision: dict, started: float, queue: list, pending: dict) -> bool:
+        return (
+            self._may_hedge(decision, queue, pending)
+            and decision["hedge_delay_s"] is not None
+            and time.perf_counter() - started >= decision["hedge_delay_s"]
+        )
+
+    def _expired(self, pending: dict, attempt_starts: dict) -> list:
+        if not self.call_timeout_s:
+            return []
+        now = time.perf_counter()
+        return [
+            attempt for attempt in pending
+            if attempt in attempt_starts and now - attempt_starts[attempt] >= self.call_timeout_s
+        ]
+
+    def _concurrent(self, decision: dict) -> bool:
+        """Whether this call may need a second attempt alongside (hedge) or instead of (timeout) a running one."""
+        return bool(self.call_timeout_s) or decision["hedge_delay_s"] is not None
+
+    def _invoke_inline(self, order: list, decision: dict, messages):
+        """Tries the candidates one after another on the calling thread, falling back on errors."""
+        started, error = time.perf_counter(), None
+        for name, runnable in order:
+            attempt_started = time.perf_counter()
+            try:
+                result = runnable.invoke(messages)
+            except Exception as e:
+                error = e
+                self._failed(decision, name, type(e).__name__)
+                continue
+            self._won(decision, name, attempt_started, started)
+            return result
+        raise error
+
+    @staticmethod
+    def _abandoned(pending: dict, attempt_starts: dict):
+        # Still running when the call ended: counted at their elapsed time, or the window keeps only the fast answers
+        now = time.perf_counter()
+        for attempt, name in pending.items():
+            if attempt in attempt_starts:
+                model_stats[name].record_lower_bound(now - attempt_starts[attempt])
+
+    @staticmethod
+    def _failed(decision: dict, name: str, error: str):
+        model_stats[name].record(None, ok=False)
+        decision["failures"].append({"model": name, "error": error})
+        if error == "timeout":
+            metrics.inc("debate_llm_timeouts_total", model=name)
+
+    def _won(self, decision: dict, name: str, attempt_started: float, started: float):
+        model_stats[name].record(time.perf_counter() - attempt_started, ok=True)
+        decision["winner"] = name
+        decision["latency_s"] = time.perf_counter() - started
+        if decision["hedged"]:
+            metrics.inc("debate_llm_hedges_total", outcome="hedge_won" if name != decision["order"][0] else "first_won")
+
+    def invoke(self, messages):
+        order, decision = self._plan()
+        if not self._concurrent(decision):
+            # Nothing to race or abandon: no threads at all, like a plain `with_fallbacks` call
+            try:
+                return self._invoke_inline(order, decision, messages)
+            finally:
+                routing_log.append(decision)
+        queue, pending, attempt_starts, started, error = list(order), {}, {}, time.perf_counter(), None
+
+        def launch():
+            name, runnable = queue.pop(0)
+            pending[_start_attempt(runnable, messages, attempt_starts)] = name
+
+        launch()
+        try:
+            while pending:
+                timeout = self._next_wait(decision, started, queue, pending, attempt_starts)
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        error = e
+                        self._failed(decision, name, type(e).__name__)
+                        continue
+                    self._won(decision, name, attempt_starts[future], started)
+                    return result
+                for future in self._expired(pending, attempt_starts):
+                    self._abandoned({future: pending[future]}, attempt_starts)
+                    name = pending.pop(future)
+                    self._failed(decision, name, "timeout")
+                    error = TimeoutError(f"{name} did not answer within {self.call_timeout_s}s")
+                if self._hedge_due(decision, started, queue, pending):
+                    decision["hedged"] = True
+                    launch()
+                if queue and not pending:
+                    launch()  # fall back to the next candidate
+            raise error
+        finally:
+            self._abandoned(pending, attempt_starts)
+            for future in pending:
+                future.cancel()  # a thread that is already running finishes unobserved
+            routing_log.append(decision)
+
+    async def ainvoke(self, messages):
+        order, decision = self._plan()
+        queue, pending, attempt_starts, started, error = list(order), {}, {}, time.perf_counter(), None
+
+        def launch():
+            name, runnable = queue.pop(0)
+            task = asyncio.create_task(runnable.ainvoke(messages))
+            pending[task], attempt_starts[task] = name, time.perf_counter()
+
+        launch()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self._next_wait(decision, started, queue, pending, attempt_starts),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    name = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        error = e
+                        self._failed(decision, name, type(e).__name__)
+                        continue
+                    self._won(decision, name, attempt_starts[task], started)
+                    return result
+                for task in self._expired(pending, attempt_starts):
+                    self._abandoned({task: pending[task]}, attempt_starts)
+                    name = pending.pop(task)
+                    task.cancel()
+                    self._failed(decision, name, "timeout")
+                    error = TimeoutError(f"{name} did not answer within {self.call_timeout_s}s")
+                if self._hedge_due(decision, started, queue, pending):
+                    decision["hedged"] = True
+                    launch()
+                if queue and not pending:
+                    launch()  # fall back to the next candidate
+            raise error
+        finally:
+            self._abandoned(pending, attempt_starts)
+            for task in pending:
+                task.cancel()
+            routing_log.append(decision)
+
+
+def routing_report(decisions=None) -> dict:
+    """Hedge rate, hedge win rate, timeouts and adaptive switches over `decisions` (default: `routing_log`), plus per-model stats."""
+    decisions = list(routing_log if decisions is None else decisions)
+    hedged = [d for d in decisions if d["hedged"]]
+    hedge_wins = sum(d["winner"] is not None and d["winner"] != d["order"][0] for d in hedged)
+    return {
+        "calls": len(decisions),
+        "hedged": len(hedged),
+        "hedge_rate": round(len(hedged) / len(decisions), 4) if decisions else 0,
+        "hedge_win_rate": round(hedge_wins / len(hedged), 4) if hedged else 0,
+        "timeouts": sum(f["error"] == "timeout" for d in decisions for f in d["failures"]),
+        "adaptive_switches": sum(d["reason"] == "adaptive" for d in decisions),
+        "models": {name: stats.summary() for name, stats in model_stats.items()},
+    }
+
+
+def reset_routing():
+    model_stats.reset()
+    routing_log.clear()
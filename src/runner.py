@@ -0,0 +1,108 @@
+import asyncio
+import os
+import time
+import uuid
+from typing import AsyncIterator, Iterable
+
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+
+from src.graph import get_graph
+from src.tracing import sampled_callbacks
+
+
+class TicketUsage(UsageMetadataCallbackHandler):
+    """Token usage of one ticket's LLM calls, plus the number of calls that completed."""
+
+    def __init__(self):
+        super().__init__()
+        self.llm_calls = 0
+
+    def on_llm_end(self, response, **kwargs):
+        super().on_llm_end(response, **kwargs)
+        with self._lock:
+            self.llm_calls += 1
+
+
+def _ticket_config(config: dict | None, thread_id: str, usage_handler) -> dict:
+    config = dict(config or {})
+    config["configurable"] = {**config.get("configurable", {}), "thread_id": thread_id}
+    callbacks = config.get("callbacks")
+    # Langfuse traces only a LANGFUSE_SAMPLE_RATE sample of tickets (see src/tracing.py)
+    handlers = [usage_handler, *sampled_callbacks()]
+    if callbacks is None or isinstance(callbacks, list):
+        config["callbacks"] = [*(callbacks or []), *handlers]
+    else:  # a callback manager
+        callbacks = callbacks.copy()
+        for handler in handlers:
+            callbacks.add_handler(handler)
+        config["callbacks"] = callbacks
+    return config
+
+
+def _token_totals(usage_metadata: dict) -> dict:
+    return {
+        "input_tokens": sum(usage.get("input_tokens", 0) for usage in usage_metadata.values()),
+        "output_tokens": sum(usage.get("output_tokens", 0) for usage in usage_metadata.values()),
+        "cached_input_tokens": sum(
+            usage.get("input_token_details", {}).get("cache_read", 0) for usage in usage_metadata.values()
+        ),
+    }
+
+
+async def arun_ticket(ticket: str | dict, graph=None, config: dict | None = None) -> dict:
+    """Runs one ticket to completion (or to the human escalation interrupt) on its own thread_id."""
+    graph = graph or get_graph()
+    ticket = {"query": ticket} if isinstance(ticket, str) else ticket
+    thread_id = ticket.get("thread_id") or f"ticket_{uuid.uuid4().hex}"
+    usage_handler = TicketUsage()
+    run_config = _ticket_config(config, thread_id, usage_handler)
+
+    start = time.perf_counter()
+    result = {"ticket": ticket, "thread_id": thread_id, "state": {}, "interrupted": False, "error": None}
+    try:
+        await graph.ainvoke({"query": ticket["query"]}, run_config)
+        snapshot = await graph.aget_state(run_config)
+        result["state"] = snapshot.values
+        result["interrupted"] = bool(snapshot.next)
+    except Exception as e:
+        # One bad ticket must not take down the rest of the batch
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["latency_s"] = time.perf_counter() - start
+    result.update(_token_totals(usage_handler.usage_metadata), llm_calls=usage_handler.llm_calls)
+    return result
+
+
+async def arun_tickets(
+    tickets: Iterable[str | dict],
+    max_concurrency: int | None = None,
+    graph=None,
+    config: dict | None = None,
+) -> AsyncIterator[dict]:
+    """Runs many tickets through the debate graph concurrently, yielding each result as soon as it finishes.
+
+    Tickets are query strings or dicts with a "query" and an optional "thread_id". They are pulled
+    from `tickets` lazily, so at most `max_concurrency` tickets (default MAX_CONCURRENT_TICKETS) are
+    in memory at once. Per-model request rates are capped separately by LLM_REQUESTS_PER_MINUTE.
+    """
+    if max_concurrency is None:
+        max_concurrency = int(os.environ.get("MAX_CONCURRENT_TICKETS", 8))
+    pending = set()
+    ticket_iter = iter(tickets)
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < max_concurrency:
+                try:
+                    ticket = next(ticket_iter)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.add(asyncio.create_task(arun_ticket(ticket, graph, config)))
+            if not pending:
+                return
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
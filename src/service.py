@@ -0,0 +1,593 @@
+"""Headless HTTP service: a plain ASGI app that queues tickets and runs them on a worker pool.
+
+    python -m src.service --port 8000          # serves with uvicorn
+    uvicorn src.service:app --port 8000        # or any other ASGI server
+
+Endpoints:
+
+    POST /tickets                      {"query", "thread_id"?, "configurable"?} -> 202 job; 429 when the queue is full
+    POST /threads/{thread_id}/resume   {"configurable"?} -> 202 job; 409 unless paused before human escalation
+    GET  /jobs/{job_id}                the job: status (queued, running, done, interrupted, failed) and timings
+    GET  /jobs/{job_id}/result         200 with the final state once finished, 202 while queued or running
+    GET  /jobs/{job_id}/events         server-sent events of the run (see src/streaming.py), replayed from the start
+    GET  /escalations                  ?limit&cursor&verdict -> one page of threads paused for human review
+    POST /escalations/approve          {"thread_ids", "draft"?} -> outcome per thread (see src/escalations.py)
+    POST /escalations/reject           {"thread_ids", "note"?} -> outcome per thread
+    POST /escalations/resume           {"thread_ids", "values"?} -> 202 with a resume job per thread
+    GET  /healthz                      queue depth, capacity and workers
+    GET  /metrics                      Prometheus text from src/metrics.py
+
+"configurable" takes only the per-run settings a caller is meant to choose (debate depth, panel size,
+transcript mode, triage threshold, tighter budgets, speculative redraft, and a model from
+SERVICE_ALLOWED_MODELS), each checked against its accepted range; anything else is a 400.
+
+Every job runs on its own checkpointer thread (the ticket's "thread_id", or a fresh one), so a
+ticket paused before human escalation can be resumed later, from this process or another one
+sharing CHECKPOINT_DB. With LLM_BACKEND=fake, or LLM_CACHE_PATH pointing at recorded responses,
+the service runs fully offline for load tests. With SERVICE_COALESCE=true, a ticket that is a
+near-duplicate of one submitted in the last COALESCE_WINDOW_S seconds waits for that ticket's
+result and reuses its verified draft instead of running its own debate (see src/coalesce.py).
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import re
+import time
+import uuid
+from urllib.parse import parse_qsl
+
+from src.coalesce import TicketCoalescer, areuse
+from src.escalations import ESCALATION_NODE, aapprove, areject, list_escalations
+from src.graph import ATTACKER_PERSONAS, _fallback_model_names, get_graph, run_setting
+from src.metrics import metrics
+from src.runner import TicketUsage, _ticket_config, _token_totals
+from src.streaming import astream_ticket
+
+MAX_BODY_BYTES = 1_048_576
+SSE_KEEPALIVE_SECONDS = 15
+
+FINISHED = ("done", "interrupted", "failed")
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, detail: str, headers: list | None = None):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.headers = headers or []
+
+
+class Job:
+    """One queued graph run: a new ticket, or the resume of a paused thread."""
+
+    def __init__(self, kind: str, thread_id: str, input: dict | None, configurable: dict):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.thread_id = thread_id
+        self.input = input
+        self.configurable = configurable
+        self.status = "queued"
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self.result = None
+        self.cluster = None  # near-duplicate cluster this job represents or reuses, when coalescing
+        self.finished = asyncio.Event()
+        # Partial (token) events are only relayed live; the rest is kept for replay to late subscribers
+        self.events = []
+        self._subscribers = set()
+
+    def publish(self, event: dict):
+        if event["type"] != "partial":
+            self.events.append(event)
+        for subscriber in self._subscribers:
+            subscriber.put_nowait(event)
+
+    def finish(self, status: str):
+        self.status = status
+        self.finished_at = time.time()
+        self.finished.set()
+        for subscriber in self._subscribers:
+            subscriber.put_nowait(None)
+
+    def subscribe(self) -> tuple[list[dict], asyncio.Queue | None]:
+        """Events so far, plus a queue of the ones still to come (None once the job has finished)."""
+        if self.status in FINISHED:
+            return list(self.events), None
+        queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        return list(self.events), queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def summary(self) -> dict:
+        return {
+            "job_id": self.id, "kind": self.kind, "thread_id": self.thread_id, "status": self.status,
+            "submitted_at": self.submitted_at, "started_at": self.started_at, "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class TicketService:
+    """ASGI app running tickets on `workers` asyncio workers fed by a bounded queue.
+
+    The queue holds at most `queue_size` jobs, counting coalesced jobs parked until their
+    representative finishes; submissions beyond that get 429 with a Retry-After estimated from
+    recent job latency, so callers back off instead of piling up work. Finished jobs
+    are kept for `max_jobs` submissions, then the oldest are forgotten (their checkpoints stay).
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        queue_size: int | None = None,
+        max_jobs: int | None = None,
+        graph=None,
+        coalesce: bool | None = None,
+    ):
+        # Unset settings are read from the environment when the workers start, after .env is loaded
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_jobs = max_jobs
+        self.graph = graph
+        self.coalesce = coalesce
+        self.coalescer = None
+        self.jobs = {}
+        self._finished = collections.deque()
+        self._active_threads = set()
+        self._queue = None
+        self._tasks = []
+        self._parked = set()  # tasks holding coalesced jobs until their representative finishes
+        self._avg_job_seconds = None
+        self._routes = [
+            ("POST", re.compile(r"/tickets"), self._submit_ticket),
+            ("POST", re.compile(r"/threads/(?P<thread_id>[^/]+)/resume"), self._submit_resume),
+            ("GET", re.compile(r"/jobs/(?P<job_id>[0-9a-f]+)"), self._job),
+            ("GET", re.compile(r"/jobs/(?P<job_id>[0-9a-f]+)/result"), self._job_result),
+            ("GET", re.compile(r"/jobs/(?P<job_id>[0-9a-f]+)/events"), self._job_events),
+            ("GET", re.compile(r"/escalations"), self._escalations),
+            ("POST", re.compile(r"/escalations/(?P<action>approve|reject)"), self._decide_escalations),
+            ("POST", re.compile(r"/escalations/resume"), self._resume_escalations),
+            ("GET", re.compile(r"/healthz"), self._health),
+            ("GET", re.compile(r"/metrics"), self._metrics),
+        ]
+
+    # Worker pool
+    def start(self):
+        """Starts the workers on the running event loop (idempotent)."""
+        if self._queue is None:
+            self.workers = self.workers or int(os.environ.get("SERVICE_WORKERS", os.environ.get("MAX_CONCURRENT_TICKETS", 8)))
+            self.queue_size = self.queue_size or int(os.environ.get("SERVICE_QUEUE_SIZE", 100))
+            self.max_jobs = self.max_jobs or int(os.environ.get("SERVICE_MAX_JOBS", 10_000))
+            if self.coalesce is None:
+                self.coalesce = os.environ.get("SERVICE_COALESCE", "false").strip().lower() in ("1", "true", "yes", "on")
+            if self.coalesce and self.coalescer is None:
+                self.coalescer = TicketCoalescer(max_age_s=float(os.environ.get("COALESCE_WINDOW_S", 900)))
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        tasks = [*self._tasks, *self._parked]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._queue, self._tasks = None, []
+        self._parked.clear()
+
+    def submit(self, job: Job) -> Job:
+        self.start()
+        if job.thread_id in self._active_threads:
+            raise HTTPError(409, f"thread {job.thread_id} already has a queued or running job")
+        if self._backlog() >= self.queue_size:
+            raise HTTPError(429, "ticket queue is full", [(b"retry-after", str(self._retry_after()).encode())])
+        if job.kind == "ticket" and self.coalescer is not None:
+            job.cluster, is_representative = self.coalescer.assign({"query": job.input["query"], "thread_id": job.thread_id})
+            if is_representative:
+                job.cluster.owner = job
+            else:
+                # Queued once the representative has finished, to reuse its result
+                job.kind = "coalesced"
+                task = asyncio.create_task(self._enqueue_after(job, job.cluster.owner))
+                self._parked.add(task)
+                task.add_done_callback(self._parked.discard)
+        if job.kind != "coalesced":
+            self._queue.put_nowait(job)
+        self._active_threads.add(job.thread_id)
+        self.jobs[job.id] = job
+        return job
+
+    async def _enqueue_after(self, job: Job, representative: Job):
+        await representative.finished.wait()
+        await self._queue.put(job)
+
+    def _backlog(self) -> int:
+        # Jobs waiting for a worker, including coalesced ones parked behind their representative
+        return self._queue.qsize() + len(self._parked)
+
+    def _retry_after(self) -> int:
+        # Time for the workers to drain the current backlog at the recent per-job latency
+        avg_job_seconds = self._avg_job_seconds or 1.0
+        return max(1, round(self._backlog() * avg_job_seconds / self.workers))
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        job.status = "running"
+        job.started_at = time.time()
+        status = "failed"
+        try:
+            if job.kind == "coalesced":
+                status = await self._run_coalesced(job)
+            if status == "failed":
+                status = await self._run_graph(job)
+        except Exception as e:
+            # A failing ticket fails its job, never the worker
+            job.error = f"{type(e).__name__}: {e}"
+            job.publish({"type": "error", "error": job.error})
+        finally:
+            self._active_threads.discard(job.thread_id)
+            if job.cluster is not None and job.cluster.owner is job:
+                job.cluster.finish({"thread_id": job.thread_id, "error": job.error, **(job.result or {})})
+            job.finish(status)
+            seconds = job.finished_at - job.started_at
+            self._avg_job_seconds = seconds if self._avg_job_seconds is None else 0.9 * self._avg_job_seconds + 0.1 * seconds
+            self._forget_old_jobs(job)
+
+    async def _run_graph(self, job: Job) -> str:
+        graph = self.graph or get_graph()
+        usage_handler = TicketUsage()
+        config = _ticket_config({"configurable": job.configurable}, job.thread_id, usage_handler)
+        async for event in astream_ticket(job.input, config, graph):
+            job.publish(event)
+        snapshot = await graph.aget_state(config)
+        job.result = {
+            "state": snapshot.values,
+            "interrupted": bool(snapshot.next),
+            **_token_totals(usage_handler.usage_metadata),
+            "llm_calls": usage_handler.llm_calls,
+        }
+        return "interrupted" if snapshot.next else "done"
+
+    async def _run_coalesced(self, job: Job) -> str:
+        """Reuses the cluster representative's result; "failed" when it cannot be shared and the graph must run."""
+        ticket = {"query": job.input["query"], "thread_id": job.thread_id}
+        result = await areuse(ticket, job.cluster, self.coalescer, {"configurable": job.configurable})
+        if result is None:
+            return "failed"
+        job.result = {key: result[key] for key in (
+            "state", "interrupted", "input_tokens", "output_tokens", "cached_input_tokens", "llm_calls", "coalesced_with", "reuse",
+        )}
+        job.publish({"type": "coalesced", "coalesced_with": result["coalesced_with"], "reuse": result["reuse"]})
+        return "done"
+
+    def _forget_old_jobs(self, job: Job):
+        self._finished.append(job.id)
+        while len(self.jobs) > self.max_jobs and self._finished:
+            self.jobs.pop(self._finished.popleft(), None)
+
+    # Handlers: each returns (status, JSON body), or an async iterator of SSE events
+    async def _submit_ticket(self, body: dict):
+        query = body.get("query")
+        if not isinstance(query, str) or not query.strip():
+            raise HTTPError(400, '"query" must be a non-empty string')
+        thread_id = str(body.get("thread_id") or f"ticket_{uuid.uuid4().hex}")
+        job = self.submit(Job("ticket", thread_id, {"query": query}, _configurable(body)))
+        return 202, job.summary()
+
+    async def _submit_resume(self, body: dict, thread_id: str):
+        graph = self.graph or get_graph()
+        snapshot = await graph.aget_state({"configurable": {"thread_id": thread_id}})
+        if ESCALATION_NODE not in snapshot.next:
+            raise HTTPError(409, f"thread {thread_id} is not paused before human escalation")
+        job = self.submit(Job("resume", thread_id, None, _configurable(body)))
+        return 202, job.summary()
+
+    async def _escalations(self, body: dict):
+        try:
+            limit = min(max(int(body.get("limit", 50)), 1), 500)
+        except ValueError:
+            raise HTTPError(400, '"limit" must be an integer')
+        checkpointer = self.graph.checkpointer if self.graph is not None else None
+        if checkpointer is not None and not hasattr(checkpointer, "escalations"):
+            raise HTTPError(501, "the graph's checkpointer does not index escalations")
+        try:
+            return 200, list_escalations(limit, body.get("cursor"), body.get("verdict"), checkpointer)
+        except ValueError:
+            raise HTTPError(400, "invalid cursor")
+
+    async def _decide_escalations(self, body: dict, action: str):
+        thread_ids = _thread_ids(body)
+        # Threads with a queued or running job are left alone; the job decides what happens to them
+        outcomes = {thread_id: {"status": "busy"} for thread_id in thread_ids if thread_id in self._active_threads}
+        idle = [thread_id for thread_id in thread_ids if thread_id not in outcomes]
+        if action == "approve":
+            outcomes.update(await aapprove(idle, _optional_text(body, "draft"), self.graph))
+        else:
+            outcomes.update(await areject(idle, _optional_text(body, "note"), self.graph))
+        return 200, {"outcomes": outcomes}
+
+    async def _resume_escalations(self, body: dict):
+        graph = self.graph or get_graph()
+        values = body.get("values")
+        if values is not None and not isinstance(values, dict):
+            raise HTTPError(400, '"values" must be an object')
+        configurable = _configurable(body)
+        outcomes = {}
+        for thread_id in _thread_ids(body):
+            try:
+                snapshot = await graph.aget_state({"configurable": {"thread_id": thread_id}})
+                if ESCALATION_NODE not in snapshot.next:
+                    raise HTTPError(409, "not paused before human escalation")
+                if thread_id in self._active_threads:
+                    raise HTTPError(409, "already has a queued or running job")
+                if values:
+                    await graph.aupdate_state({"configurable": {"thread_id": thread_id}}, values)
+                outcomes[thread_id] = self.submit(Job("resume", thread_id, None, configurable)).summary()
+            except HTTPError as e:
+                # A full queue stops the batch; the remaining threads stay paused and can be resubmitted
+                outcomes[thread_id] = {"status": "skipped", "error": e.detail}
+                if e.status == 429:
+                    break
+        return 202, {"outcomes": outcomes}
+
+    async def _job(self, body: dict, job_id: str):
+        return 200, self._get_job(job_id).summary()
+
+    async def _job_result(self, body: dict, job_id: str):
+        job = self._get_job(job_id)
+        if job.status not in FINISHED:
+            return 202, job.summary()
+        return 200, {**job.summary(), "result": job.result}
+
+    async def _job_events(self, body: dict, job_id: str):
+        job = self._get_job(job_id)
+        history, queue = job.subscribe()
+
+        async def events():
+            try:
+                for event in history:
+                    yield event
+                while queue is not None:
+                    try:
+                        event = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                    except asyncio.TimeoutError:
+                        yield None  # keep-alive comment
+                        continue
+                    if event is None:
+                        break
+                    yield event
+                yield {"type": "job", **job.summary()}
+            finally:
+                if queue is not None:
+                    job.unsubscribe(queue)
+
+        return events()
+
+    async def _health(self, body: dict):
+        queued = self._queue.qsize() if self._queue is not None else 0
+        running = sum(job.status == "running" for job in self.jobs.values())
+        health = {"queued": queued, "running": running, "queue_size": self.queue_size, "workers": self.workers}
+        if self.coalescer is not None:
+            health["parked"] = len(self._parked)
+            health["coalescing"] = self.coalescer.stats()
+        return 200, health
+
+    async def _metrics(self, body: dict):
+        return 200, metrics.prometheus_text()
+
+    def _get_job(self, job_id: str) -> Job:
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise HTTPError(404, f"unknown job {job_id}")
+        return job
+
+    # ASGI
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        self.start()  # servers without lifespan support
+        try:
+            handler, params = self._route(scope["method"], scope["path"])
+            if scope["method"] == "POST":
+                body = await _read_json(receive)
+            else:
+                body = dict(parse_qsl(scope.get("query_string", b"").decode()))
+            response = await handler(body, **params)
+        except HTTPError as e:
+            await _send_json(send, e.status, {"error": e.detail}, e.headers)
+            return
+        if isinstance(response, tuple):
+            await _send_json(send, *response)
+        else:
+            await _send_events(send, response)
+
+    def _route(self, method: str, path: str):
+        allowed = False
+        for route_method, pattern, handler in self._routes:
+            match = pattern.fullmatch(path.rstrip("/") or "/")
+            if match:
+                if route_method == method:
+                    return handler, match.groupdict()
+                allowed = True
+        raise HTTPError(405 if allowed else 404, f"{method} {path} not found" if not allowed else f"{method} not allowed")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _within_operator_limit(name: str):
+    """A budget a caller may tighten but not lift: positive, and no more than the configured limit (if any)."""
+    limit = run_setting(None, name)
+
+    def valid(value) -> bool:
+        return _is_number(value) and value > 0 and (not limit or value <= limit)
+
+    return valid, f"a positive number{f' up to {limit}' if limit else ''}"
+
+
+def _client_settings() -> dict:
+    """Per-run settings (see RUN_SETTINGS in src/graph.py) an HTTP caller may choose: name -> (check, accepted values).
+
+    The LLM backend, fallback chain and routing stay with the operator; models are limited to
+    SERVICE_ALLOWED_MODELS (default: the configured primary and fallback models), so callers can
+    neither reach other providers nor grow the process-wide client registry without bound.
+    """
+    max_turns = int(os.environ.get("SERVICE_MAX_DEBATE_TURNS", 5))
+    models = os.environ.get("SERVICE_ALLOWED_MODELS", "").split(",")
+    models = {name.strip() for name in models if name.strip()} or {
+        run_setting(None, "llm_model_name"), *_fallback_model_names(None)
+    }
+    max_redrafts = run_setting(None, "max_redrafts")
+    return {
+        "max_debate_turns": (lambda v: _is_int(v) and 1 <= v <= max_turns, f"an integer from 1 to {max_turns}"),
+        "attacker_panel_size": (
+            lambda v: _is_int(v) and 1 <= v <= len(ATTACKER_PERSONAS), f"an integer from 1 to {len(ATTACKER_PERSONAS)}"
+        ),
+        "transcript_mode": (lambda v: v in ("full", "rolling"), '"full" or "rolling"'),
+        "triage_risk_threshold": (lambda v: _is_number(v) and 0 <= v <= 1, "a number from 0 to 1"),
+        "max_redrafts": (lambda v: _is_int(v) and 0 <= v <= max_redrafts, f"an integer from 0 to {max_redrafts}"),
+        "max_ticket_tokens": _within_operator_limit("max_ticket_tokens"),
+        "max_ticket_seconds": _within_operator_limit("max_ticket_seconds"),
+        "speculative_redraft": (lambda v: isinstance(v, bool), "true or false"),
+        "llm_model_name": (lambda v: v in models, f"one of {', '.join(sorted(models))}"),
+    }
+
+
+def _configurable(body: dict) -> dict:
+    configurable = body.get("configurable") or {}
+    if not isinstance(configurable, dict):
+        raise HTTPError(400, '"configurable" must be an object')
+    settings = _client_settings()
+    for name, value in configurable.items():
+        if name not in settings:
+            # The thread is chosen by the service, never by per-run settings
+            raise HTTPError(400, f'"configurable.{name}" cannot be set per request; allowed: {", ".join(settings)}')
+        valid, accepted = settings[name]
+        if not valid(value):
+            raise HTTPError(400, f'"configurable.{name}" must be {accepted}')
+    return dict(configurable)
+
+
+def _optional_text(body: dict, name: str) -> str | None:
+    """A manager-written text field (replacement draft, rejection note), checked before it reaches a checkpoint."""
+    value = body.get(name)
+    if value is None:
+        return None
+    max_chars = int(os.environ.get("SERVICE_MAX_DRAFT_CHARS", 20_000))
+    if not isinstance(value, str) or not value.strip() or len(value) > max_chars:
+        raise HTTPError(400, f'"{name}" must be a non-empty string of at most {max_chars} characters')
+    return value
+
+
+def _thread_ids(body: dict) -> list[str]:
+    thread_ids = body.get("thread_ids")
+    if not isinstance(thread_ids, list) or not thread_ids or not all(isinstance(t, str) and t for t in thread_ids):
+        raise HTTPError(400, '"thread_ids" must be a non-empty list of strings')
+    return list(dict.fromkeys(thread_ids))
+
+
+async def _read_json(receive) -> dict:
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise HTTPError(413, "request body too large")
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            break
+    raw = b"".join(chunks)
+    if not raw.strip():
+        return {}
+    try:
+        body = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise HTTPError(400, f"invalid JSON: {e}")
+    if not isinstance(body, dict):
+        raise HTTPError(400, "request body must be a JSON object")
+    return body
+
+
+async def _send_json(send, status: int, body, headers: list | None = None):
+    if isinstance(body, str):
+        payload, content_type = body.encode(), b"text/plain; version=0.0.4"
+    else:
+        payload, content_type = json.dumps(body, default=str).encode(), b"application/json"
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(payload)).encode()), *(headers or [])],
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+
+async def _send_events(send, events):
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"text/event-stream"), (b"cache-control", b"no-cache")],
+    })
+    try:
+        async for event in events:
+            if event is None:
+                chunk = b": keep-alive\n\n"
+            else:
+                chunk = f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n".encode()
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+    except OSError:
+        pass  # the client went away
+    finally:
+        await events.aclose()
+
+
+app = TicketService()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the debate graph over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("src.service needs an ASGI server to run standalone: pip install uvicorn")
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
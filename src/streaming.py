@@ -0,0 +1,115 @@
+"""Token-level streaming of debate runs, for the Streamlit UI and any programmatic caller.
+
+`stream_ticket` / `astream_ticket` run the graph with LangGraph's "tasks", "messages" and "updates"
+stream modes and turn them into plain dict events:
+
+    {"type": "node_start", "node", "task_id"}
+    {"type": "partial", "node", "task_id", "fields"}                    # fields parsed so far from the streamed JSON
+    {"type": "update", "node", "task_id", "update", "first_token_s"}    # the node's finished state update
+    {"type": "interrupt", "value"}                                      # paused before human escalation
+    {"type": "end", "interrupted", "first_token_s": {node: [seconds, ...]}}
+
+Nodes still parse and validate their Pydantic schemas (`DraftResponse`, `JudgeResponse`, ...) as
+before; the partial fields are only a preview built from the same chunks the structured-output
+parser consumes. Time-to-first-token is measured from the node's start to its first streamed chunk.
+"""
+import json
+import time
+from collections import defaultdict
+from typing import AsyncIterator, Iterator
+
+from langchain_core.messages import AIMessageChunk
+from langchain_core.utils.json import parse_partial_json
+
+from src.graph import SPECULATIVE_TAG, get_graph
+
+STREAM_MODES = ["tasks", "messages", "updates"]
+
+
+def _fragment(message) -> str:
+    """The structured-output JSON carried by a message: tool-call arguments (function calling) or text (JSON mode)."""
+    if isinstance(message, AIMessageChunk) and message.tool_call_chunks:
+        return message.tool_call_chunks[0].get("args") or ""
+    if getattr(message, "tool_calls", None):
+        return json.dumps(message.tool_calls[0]["args"])
+    return message.text
+
+
+class _EventTranslator:
+    """Turns raw (mode, payload) stream items into the events described in the module docstring."""
+
+    def __init__(self):
+        self.started = {}          # task_id -> perf_counter at node start
+        self.first_token = {}      # task_id -> seconds to first chunk
+        self.buffers = {}          # message id -> JSON text received so far
+        self.parsed = {}           # message id -> last fields emitted
+        self.first_token_s = defaultdict(list)
+        self.interrupted = False
+
+    def handle(self, mode: str, payload) -> list[dict]:
+        if mode == "tasks":
+            return self._task(payload)
+        if mode == "messages":
+            return self._message(*payload)
+        if mode == "updates" and "__interrupt__" in payload:
+            self.interrupted = True
+            return [{"type": "interrupt", "value": payload["__interrupt__"]}]
+        return []
+
+    def end(self) -> dict:
+        return {"type": "end", "interrupted": self.interrupted, "first_token_s": dict(self.first_token_s)}
+
+    def _task(self, task: dict) -> list[dict]:
+        if "result" not in task:
+            self.started[task["id"]] = time.perf_counter()
+            return [{"type": "node_start", "node": task["name"], "task_id": task["id"]}]
+        self.started.pop(task["id"], None)
+        if task.get("error"):
+            return []
+        first_token_s = self.first_token.pop(task["id"], None)
+        if first_token_s is not None:
+            self.first_token_s[task["name"]].append(first_token_s)
+        return [{
+            "type": "update", "node": task["name"], "task_id": task["id"],
+            "update": task["result"], "first_token_s": first_token_s,
+        }]
+
+    def _message(self, message, metadata: dict) -> list[dict]:
+        if SPECULATIVE_TAG in metadata.get("tags", ()):
+            return []  # the judge's background redraft: neither the judge's output nor its first token
+        node = metadata.get("langgraph_node")
+        task_id = metadata.get("langgraph_checkpoint_ns", "").split("|")[0].rpartition(":")[2]
+        fragment = _fragment(message)
+        if not fragment:
+            return []
+        if task_id in self.started and task_id not in self.first_token:
+            self.first_token[task_id] = time.perf_counter() - self.started[task_id]
+
+        # Chunks extend the buffer; a whole message (the model did not stream) replaces it
+        key = message.id or task_id
+        text = self.buffers.get(key, "") + fragment if isinstance(message, AIMessageChunk) else fragment
+        self.buffers[key] = text
+        fields = parse_partial_json(text)
+        if not isinstance(fields, dict) or not fields or fields == self.parsed.get(key):
+            return []
+        self.parsed[key] = fields
+        return [{"type": "partial", "node": node, "task_id": task_id, "fields": fields}]
+
+
+def stream_ticket(input: dict, config: dict | None = None, graph=None) -> Iterator[dict]:
+    """Runs (or resumes, with input None) a ticket with `graph.stream`, yielding token-level events."""
+    graph = graph or get_graph()
+    translator = _EventTranslator()
+    for mode, payload in graph.stream(input, config, stream_mode=STREAM_MODES):
+        yield from translator.handle(mode, payload)
+    yield translator.end()
+
+
+async def astream_ticket(input: dict, config: dict | None = None, graph=None) -> AsyncIterator[dict]:
+    """Async variant of `stream_ticket`, built on `graph.astream`."""
+    graph = graph or get_graph()
+    translator = _EventTranslator()
+    async for mode, payload in graph.astream(input, config, stream_mode=STREAM_MODES):
+        for event in translator.handle(mode, payload):
+            yield event
+    yield translator.end()
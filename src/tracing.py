@@ -0,0 +1,37 @@
+"""Optional, sampled Langfuse tracing.
+
+Tracing is on only when the `langfuse` package is installed and LANGFUSE_PUBLIC_KEY is set, and
+then only for a LANGFUSE_SAMPLE_RATE fraction of runs (default 1.0), so high-volume batch runs can
+trace a small sample instead of paying for every ticket. Local metrics (src/metrics.py) cover
+every run either way.
+"""
+import os
+import random
+import threading
+
+_handler = None
+_handler_lock = threading.Lock()
+
+
+def langfuse_handler():
+    """The shared Langfuse CallbackHandler, or None when tracing is not configured."""
+    global _handler
+    if _handler is None and os.environ.get("LANGFUSE_PUBLIC_KEY"):
+        with _handler_lock:
+            if _handler is None:
+                try:
+                    from langfuse.langchain import CallbackHandler
+                except ImportError:
+                    return None
+                _handler = CallbackHandler()
+    return _handler
+
+
+def sampled_callbacks(sample_rate: float | None = None) -> list:
+    """Callbacks to trace one run: the Langfuse handler for a sampled run, otherwise none."""
+    if sample_rate is None:
+        sample_rate = float(os.environ.get("LANGFUSE_SAMPLE_RATE", 1))
+    handler = langfuse_handler()
+    if handler is None or random.random() >= sample_rate:
+        return []
+    return [handler]
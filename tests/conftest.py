@@ -0,0 +1,18 @@
+import pytest
+
+from src import graph as graph_module
+from src.fake_llm import reset_fake_llm
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Runs the graph on the offline fake backend with no model latency and a clean response cache."""
+    monkeypatch.setenv("LLM_BACKEND", "fake")
+    monkeypatch.setenv("FAKE_LLM_LATENCY_MS", "0")
+    monkeypatch.setenv("FAKE_LLM_SEED", "0")
+    monkeypatch.delenv("LLM_CACHE_PATH", raising=False)
+    graph_module.invalidate_llm_clients()
+    reset_fake_llm()
+    yield
+    graph_module.invalidate_llm_clients()
+    reset_fake_llm()
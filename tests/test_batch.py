@@ -0,0 +1,27 @@
+import asyncio
+import json
+
+from src.batch import run_batch
+
+
+def test_bad_lines_get_an_error_record_and_the_batch_goes_on(fake_llm, tmp_path):
+    input_path, output_path = tmp_path / "tickets.jsonl", tmp_path / "results.jsonl"
+    input_path.write_text("\n".join([
+        json.dumps({"ticket_id": "a", "query": "My $600 bag strap broke, I want a refund."}),
+        "{not json",
+        json.dumps({"ticket_id": "b", "text": "no query here"}),
+        json.dumps(["not", "an", "object"]),
+        json.dumps({"ticket_id": "c", "query": "Where is my order?"}),
+    ]) + "\n")
+
+    counts = asyncio.run(run_batch(input_path, output_path, max_concurrency=2))
+
+    records = {record["ticket_id"]: record for record in map(json.loads, output_path.read_text().splitlines())}
+    assert set(records) == {"a", "c", "line-2", "line-3", "line-4"}
+    assert not records["a"]["error"] and not records["c"]["error"]
+    assert all(records[f"line-{n}"]["error"].startswith("invalid ticket") for n in (2, 3, 4))
+    assert counts["completed"] == 2 and counts["failed"] == 3
+
+    # A restart skips the finished tickets and still gets past the bad lines
+    counts = asyncio.run(run_batch(input_path, output_path, max_concurrency=2))
+    assert counts["skipped"] == 2 and counts["completed"] == 0 and counts["failed"] == 3
@@ -0,0 +1,30 @@
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
+
+from src.cache import ResponseCache
+from src.graph import DraftResponse, _with_response_cache
+
+MESSAGES = [SystemMessage(content="Draft a reply."), HumanMessage(content="My $600 bag strap broke.")]
+
+
+def test_key_depends_on_backend():
+    fake = ResponseCache.key("fake", "gemini-2.5-flash", DraftResponse, MESSAGES)
+    google = ResponseCache.key("google", "gemini-2.5-flash", DraftResponse, MESSAGES)
+    assert fake != google
+
+
+def test_response_cached_on_one_backend_misses_on_another(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+    calls = []
+
+    def llm(backend):
+        def respond(messages):
+            calls.append(backend)
+            return DraftResponse(draft=f"from {backend}", sources_cited=[])
+        return _with_response_cache(RunnableLambda(respond), cache, backend, "gemini-2.5-flash", DraftResponse)
+
+    assert llm("fake").invoke(MESSAGES).draft == "from fake"
+    assert llm("fake").invoke(MESSAGES).draft == "from fake"
+    assert llm("google").invoke(MESSAGES).draft == "from google"
+    assert calls == ["fake", "google"]
+    assert cache.stats()["hits"] == 1
@@ -0,0 +1,170 @@
+import copy
+
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+
+from src import checkpoint as checkpoint_module
+from src import graph as graph_module
+from src.checkpoint import SqliteCheckpointSaver
+from src.graph import build_graph
+
+QUERY = "The strap on my $600 bag broke after a week, I want a refund. " * 8  # long enough to be compressed
+DEBATE = {"max_debate_turns": 5}
+
+
+class RecordingSaver(InMemorySaver):
+    """InMemorySaver that records every put and put_writes, to replay them into another saver."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        self.calls.append(("put", copy.deepcopy((config, checkpoint, metadata, new_versions))))
+        return super().put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        self.calls.append(("put_writes", copy.deepcopy((config, writes, task_id, task_path))))
+        return super().put_writes(config, writes, task_id, task_path)
+
+
+def _compile(saver):
+    return build_graph().compile(checkpointer=saver, interrupt_before=["human_escalation"])
+
+
+def _run(saver, thread_id: str = "ticket", **configurable) -> dict:
+    config = {"configurable": {"thread_id": thread_id, **DEBATE, **configurable}}
+    return _compile(saver).invoke({"query": QUERY}, config)
+
+
+def _saved(checkpoint_tuple) -> tuple:
+    checkpoint = checkpoint_tuple.checkpoint
+    return (
+        checkpoint["id"],
+        checkpoint["channel_values"],
+        checkpoint["channel_versions"],
+        checkpoint["versions_seen"],
+        checkpoint_tuple.metadata,
+        checkpoint_tuple.parent_config and checkpoint_tuple.parent_config["configurable"]["checkpoint_id"],
+        sorted(checkpoint_tuple.pending_writes, key=repr),
+    )
+
+
+@pytest.fixture
+def sqlite_saver(tmp_path):
+    savers = []
+
+    def make(**kwargs):
+        saver = SqliteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"), escalation_node="human_escalation", **kwargs)
+        savers.append(saver)
+        return saver
+
+    yield make
+    for saver in savers:
+        try:
+            saver.close()
+        except Exception:
+            pass  # already closed by the test
+
+
+@pytest.mark.parametrize("max_delta_chain", [32, 2])
+def test_round_trip_matches_in_memory_saver(fake_llm, sqlite_saver, monkeypatch, max_delta_chain):
+    # A short delta chain makes the transcript be stored whole again part way through the run
+    monkeypatch.setattr(checkpoint_module, "_MAX_DELTA_CHAIN", max_delta_chain)
+    memory = RecordingSaver()
+    _run(memory)
+    saver = sqlite_saver(keep_last=1_000)
+    for method, args in memory.calls:
+        getattr(saver, method)(*args)
+
+    config = {"configurable": {"thread_id": "ticket"}}
+    expected = [_saved(item) for item in memory.list(config)]
+    assert len(expected) > 10
+    assert [_saved(item) for item in saver.list(config)] == expected
+    assert _saved(saver.get_tuple(config)) == _saved(memory.get_tuple(config))
+    stored = saver._conn.execute("SELECT base_version IS NOT NULL, type LIKE '%+zlib' FROM blobs").fetchall()
+    assert any(delta for delta, _ in stored) and any(compressed for _, compressed in stored)
+
+
+def test_graph_state_reads_back_from_the_store(fake_llm, sqlite_saver):
+    saver = sqlite_saver()
+    final = _run(saver)
+    graph = _compile(saver)
+    assert graph.get_state({"configurable": {"thread_id": "ticket"}}).values == final
+    assert len(final["debate_rounds"]) == 10
+
+
+def test_keep_last_retention(fake_llm, sqlite_saver):
+    saver = sqlite_saver(keep_last=3)
+    _run(saver)
+    assert len(list(saver.list({"configurable": {"thread_id": "ticket"}}))) == 3
+
+
+def test_fork_from_a_checkpoint_whose_parents_were_pruned(fake_llm, sqlite_saver):
+    saver = sqlite_saver(keep_last=3)
+    final = _run(saver)
+    graph = _compile(saver)
+    oldest = list(graph.get_state_history({"configurable": {"thread_id": "ticket"}}))[-1]
+    assert saver.get_tuple(oldest.parent_config) is None  # pruned by retention
+
+    fork = graph.update_state(oldest.config, {"draft": "Edited by a manager."})
+    forked = graph.get_state(fork)
+    assert forked.values["draft"] == "Edited by a manager."
+    assert forked.values["debate_rounds"] == oldest.values["debate_rounds"]
+    assert forked.values["query"] == final["query"]
+    # The fork is now the thread's latest checkpoint, and reads back whole after retention runs again
+    assert graph.get_state({"configurable": {"thread_id": "ticket"}}).values == forked.values
+
+
+def test_batched_commits_lose_nothing_on_close(fake_llm, sqlite_saver):
+    saver = sqlite_saver(commit_every=1_000)
+    _run(saver, "first")
+    _run(saver, "second")
+    before = {thread_id: [_saved(item) for item in saver.list({"configurable": {"thread_id": thread_id}})]
+              for thread_id in ("first", "second")}
+    saver.close()
+
+    reopened = sqlite_saver()
+    for thread_id, expected in before.items():
+        assert [_saved(item) for item in reopened.list({"configurable": {"thread_id": thread_id}})] == expected
+
+
+def _pause_for_escalation(saver, thread_id: str, monkeypatch):
+    monkeypatch.setenv("FAKE_LLM_VERDICTS", "AMBIGUOUS")
+    graph_module.invalidate_llm_clients()
+    _run(saver, thread_id)
+    monkeypatch.setenv("FAKE_LLM_VERDICTS", "PASS")
+    graph_module.invalidate_llm_clients()
+
+
+def test_escalation_index_and_reindex(fake_llm, sqlite_saver, monkeypatch):
+    saver = sqlite_saver()
+    _run(saver, "finished")
+    _pause_for_escalation(saver, "paused", monkeypatch)
+    items, _ = saver.escalations()
+    assert [item["thread_id"] for item in items] == ["paused"]
+    assert items[0]["verdict"] == "AMBIGUOUS"
+
+    saver._conn.execute("DELETE FROM escalations")
+    assert saver.reindex_escalations() == 1
+    assert [item["thread_id"] for item in saver.escalations()[0]] == ["paused"]
+
+    # Handled by a manager, the thread leaves the index
+    _compile(saver).update_state({"configurable": {"thread_id": "paused"}}, {"verdict": "PASS"}, as_node="human_escalation")
+    assert saver.escalation_count() == 0
+
+
+def test_compact_keeps_only_threads_paused_for_escalation(fake_llm, sqlite_saver, monkeypatch):
+    saver = sqlite_saver()
+    _run(saver, "finished")
+    _pause_for_escalation(saver, "paused", monkeypatch)
+    # Stopped before another node, as a run that crashed mid-debate leaves its thread
+    crashed = build_graph().compile(checkpointer=saver, interrupt_before=["judge"])
+    crashed.invoke({"query": QUERY}, {"configurable": {"thread_id": "crashed"}})
+    assert crashed.get_state({"configurable": {"thread_id": "crashed"}}).next == ("judge",)
+
+    assert saver.compact(ttl_seconds=0) == {"deleted_threads": 2, "kept_paused_threads": 1}
+    assert saver.get_tuple({"configurable": {"thread_id": "paused"}}) is not None
+    assert saver.get_tuple({"configurable": {"thread_id": "finished"}}) is None
+    assert saver.get_tuple({"configurable": {"thread_id": "crashed"}}) is None
+    assert [item["thread_id"] for item in saver.escalations()[0]] == ["paused"]
@@ -0,0 +1,28 @@
+import asyncio
+
+from src.coalesce import TicketCoalescer, arun_coalesced
+
+QUERY = "Please refund $40 for my scarf, order {}, it arrived torn."
+
+
+def test_cluster_keeps_only_the_shared_fields(fake_llm):
+    coalescer = TicketCoalescer()
+
+    async def run():
+        tickets = [{"query": QUERY.format(i), "thread_id": f"t{i}"} for i in range(3)]
+        return [result async for result in arun_coalesced(tickets, coalescer, max_concurrency=1)]
+
+    results = asyncio.run(run())
+    assert all(result["state"]["verdict"] == "PASS" for result in results)
+    assert coalescer.stats()["coalesced"] == 2
+    (cluster,) = coalescer._clusters.values()
+    assert set(cluster.result) == {
+        "thread_id", "error", "interrupted", "llm_calls", "draft", "sources_cited", "verdict", "debate_synthesis",
+    }
+
+
+def test_amounts_of_another_magnitude_do_not_share_a_cluster():
+    coalescer = TicketCoalescer()
+    small, _ = coalescer.assign({"query": QUERY.format(1)})
+    large, is_representative = coalescer.assign({"query": QUERY.format(1).replace("$40", "$40,000")})
+    assert is_representative and large is not small
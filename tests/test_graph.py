@@ -0,0 +1,49 @@
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+from src.graph import build_graph
+
+QUERY = "The strap on my $600 bag broke after a week, I want a refund."
+
+
+def _node_sequence(config: dict) -> list[str]:
+    graph = build_graph().compile(checkpointer=InMemorySaver(), interrupt_before=["human_escalation"])
+    config = {"configurable": {"thread_id": "budget", **config}}
+    return [node for update in graph.stream({"query": QUERY}, config, stream_mode="updates") for node in update]
+
+
+def test_debate_runs_within_budget(fake_llm):
+    nodes = _node_sequence({"max_debate_turns": 2})
+    assert nodes.count("attacker") == 2 and nodes.count("defender") == 2
+
+
+def test_spent_budget_skips_the_debate(fake_llm):
+    nodes = _node_sequence({"max_ticket_tokens": 10, "max_debate_turns": 3})
+    assert nodes[:3] == ["intake", "draft", "judge"]
+    assert "attacker" not in nodes and "defender" not in nodes
+
+
+def test_provider_retries_are_counted(fake_llm, monkeypatch):
+    from langchain_core.exceptions import ModelRateLimitError
+
+    from src import graph as graph_module
+    from src.fake_llm import FakeChatModel
+    from src.graph import DraftResponse, get_llm
+    from src.metrics import metrics
+
+    class FlakyModel(FakeChatModel):
+        calls: int = 0
+
+        def _generate(self, *args, **kwargs):
+            self.calls += 1
+            if self.calls == 1:
+                raise ModelRateLimitError("429 quota exceeded")
+            return super()._generate(*args, **kwargs)
+
+    flaky = FlakyModel(model="gemini-flaky", latency_ms=0)
+    monkeypatch.setattr(graph_module, "_chat_model", lambda name, backend="google": flaky)
+    before = metrics.value("debate_llm_retries_total", model="gemini-flaky")
+    config = {"configurable": {"llm_backend": "google", "llm_model_name": "gemini-flaky", "llm_fallback_model_name": ""}}
+    get_llm(DraftResponse, config).invoke([HumanMessage(content=QUERY)], config)
+    assert flaky.calls == 2
+    assert metrics.value("debate_llm_retries_total", model="gemini-flaky") == before + 1
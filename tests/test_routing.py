@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from src.routing import HedgedRouter, model_stats, reset_routing, routing_report
+
+
+def _sleeping(seconds: float, answer: str):
+    def invoke(messages):
+        time.sleep(seconds)
+        return answer
+
+    async def ainvoke(messages):
+        await asyncio.sleep(seconds)
+        return answer
+
+    return RunnableLambda(invoke, afunc=ainvoke)
+
+
+@pytest.fixture
+def router():
+    reset_routing()
+    for _ in range(20):
+        model_stats["primary"].record(0.01, ok=True)
+    yield HedgedRouter([("primary", _sleeping(0.2, "slow")), ("fallback", _sleeping(0, "fast"))], hedge_percentile=50)
+    reset_routing()
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_hedge_loser_is_counted_at_its_elapsed_time(router, mode):
+    for _ in range(5):
+        answer = router.invoke([]) if mode == "sync" else asyncio.run(router.ainvoke([]))
+        assert answer == "fast"
+    assert routing_report()["hedged"] == 5
+    primary = model_stats["primary"]
+    assert primary.samples == 25
+    # Every abandoned attempt ran for at least the hedge delay before the fallback won
+    assert min(primary._sorted[-5:]) >= 0.01
+
+
+def test_timed_out_attempt_is_counted_at_its_elapsed_time():
+    reset_routing()
+    router = HedgedRouter([("primary", _sleeping(0.2, "slow")), ("fallback", _sleeping(0, "fast"))], call_timeout_s=0.05)
+    assert router.invoke([]) == "fast"
+    primary = model_stats["primary"].summary()
+    assert primary["samples"] == 1 and primary["error_rate"] > 0
+    assert model_stats["primary"]._sorted[0] >= 0.05
+    reset_routing()
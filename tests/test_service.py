@@ -0,0 +1,36 @@
+import asyncio
+
+import httpx
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+
+from src.graph import build_graph
+from src.service import TicketService
+
+
+def _post(path: str, body: dict) -> httpx.Response:
+    graph = build_graph().compile(checkpointer=InMemorySaver(), interrupt_before=["human_escalation"])
+    service = TicketService(graph=graph)
+
+    async def post():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=service), base_url="http://service") as client:
+            return await client.post(path, json=body)
+
+    return asyncio.run(post())
+
+
+@pytest.mark.parametrize("draft", [42, ["a draft"], "", "x" * 20_001])
+def test_approve_rejects_an_invalid_draft(fake_llm, draft):
+    response = _post("/escalations/approve", {"thread_ids": ["ticket"], "draft": draft})
+    assert response.status_code == 400
+    assert '"draft"' in response.json()["error"]
+
+
+def test_reject_rejects_an_invalid_note(fake_llm):
+    assert _post("/escalations/reject", {"thread_ids": ["ticket"], "note": {"text": "no"}}).status_code == 400
+
+
+def test_approve_accepts_a_valid_draft(fake_llm):
+    response = _post("/escalations/approve", {"thread_ids": ["ticket"], "draft": "Refund approved."})
+    assert response.status_code == 200
+    assert response.json()["outcomes"] == {"ticket": {"status": "not_paused"}}